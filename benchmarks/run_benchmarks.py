@@ -0,0 +1,256 @@
+#!/usr/bin/env python
+# -- coding: utf-8 --
+""" timings for the performance sensitive parts of jsonextended
+
+run from the repository root (or with jsonextended installed)::
+
+    python benchmarks/run_benchmarks.py
+    python benchmarks/run_benchmarks.py --leaves 300000 --repeat 5
+
+each benchmark reports the best time of --repeat runs, on:
+
+- the example data folder shipped with the package (utils.get_test_path)
+- a synthetic tree, generated from a fixed seed (so runs are reproducible),
+  which is also written (with edict.to_json) to a temporary folder of files
+
+benchmarks of optional packages (orjson, simdjson, ujson, ijson, pint)
+are skipped if they are not installed
+
+"""
+from __future__ import print_function
+import argparse
+import json
+import math
+import os
+import random
+import shutil
+import sys
+import tempfile
+import timeit
+
+# use the jsonextended in this repository, rather than an installed one
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                os.pardir))
+
+from jsonextended import backends, edict, ejson, plugins  # noqa: E402
+from jsonextended.utils import get_test_path  # noqa: E402
+
+_NAMES = ('energy', 'length', 'mass', 'time', 'charge')
+
+
+def synthetic_tree(leaves, depth=3, seed=0):
+    """ create a nested dict, of the given depth, with at least leaves values
+
+    keys are <name><index> (e.g. energy0, length1, ...),
+    values are a random mix of floats, ints, strings, lists and small dicts
+    """
+    rand = random.Random(seed)
+    width = max(2, int(math.ceil(leaves ** (1. / depth))))
+
+    def value():
+        kind = rand.randint(0, 4)
+        if kind == 0:
+            return rand.random()
+        elif kind == 1:
+            return rand.randint(-1000, 1000)
+        elif kind == 2:
+            return 'value{}'.format(rand.randint(0, 1000))
+        elif kind == 3:
+            return [rand.random() for _ in range(3)]
+        return {'magnitude': rand.random(), 'units': 'eV'}
+
+    def branch(level):
+        if level == depth:
+            return value()
+        return {'{0}{1}'.format(_NAMES[i % len(_NAMES)], i): branch(level + 1)
+                for i in range(width)}
+
+    return branch(0)
+
+
+def key_patterns(count=60):
+    """ count glob patterns, count literal keys and one '?' pattern,
+    as used for filter_keys and remove_keys
+    """
+    globs = ['{0}{1}*'.format(_NAMES[i % len(_NAMES)], i)
+             for i in range(count)]
+    literals = ['{0}{1}'.format(_NAMES[i % len(_NAMES)], i)
+                for i in range(1, 2 * count, 2)]
+    return globs + literals + ['mass?']
+
+
+def best_of(func, repeat):
+    """ the best time (in seconds) of repeat calls to func """
+    times = []
+    for _ in range(repeat):
+        start = timeit.default_timer()
+        func()
+        times.append(timeit.default_timer() - start)
+    return min(times)
+
+
+def installed_backends():
+    """ the (readers, writers) that can be selected """
+    readers, writers = [], []
+    for name in ('json', 'orjson', 'simdjson', 'ujson'):
+        with backends.backend_context(name):
+            if backends.active_backend()[0] == name:
+                readers.append(name)
+        if name == 'simdjson':
+            continue
+        with backends.backend_context(writer=name):
+            if backends.active_backend()[1] == name:
+                writers.append(name)
+    return readers, writers
+
+
+def run(leaves, repeat, workers, seed=0):
+    """ run all the benchmarks, yielding (group, name, seconds) """
+    plugins.load_builtin_plugins('decoders')
+    example = get_test_path()
+    tree = synthetic_tree(leaves, seed=seed)
+    doc = json.dumps(tree)
+    readers, writers = installed_backends()
+    outfolder = tempfile.mkdtemp()
+    try:
+        # example data folder
+        yield ('example', 'ejson.to_dict(folder)',
+               best_of(lambda: ejson.to_dict(example), repeat))
+        yield ('example', 'ejson.jkeys(folder)',
+               best_of(lambda: ejson.jkeys(example), repeat))
+        key_paths = [['dir1', 'file1', 'initial'], ['dir1', 'file2']]
+        yield ('example', 'ejson.to_dicts(folder, 2 key paths)',
+               best_of(lambda: ejson.to_dicts(example, key_paths), repeat))
+        try:
+            import ijson  # noqa: F401
+        except ImportError:
+            pass
+        else:
+            yield ('example', 'ejson.to_dict(key path, in_memory=False)',
+                   best_of(lambda: ejson.to_dict(example, key_paths[0],
+                                                 in_memory=False), repeat))
+
+        # backends and decoder plugins (synthetic document)
+        for reader in readers:
+            with backends.backend_context(reader):
+                yield ('backends', 'loads, reader={}'.format(reader),
+                       best_of(lambda: backends.loads(doc), repeat))
+                yield ('backends',
+                       'loads(object_hook=decode), reader={}'.format(reader),
+                       best_of(lambda: backends.loads(
+                           doc, object_hook=plugins.decode), repeat))
+        for writer in writers:
+            # fast writers are only used for ensure_ascii=False
+            with backends.backend_context(writer=writer):
+                yield ('backends',
+                       'dumps(ensure_ascii=False), writer={}'.format(writer),
+                       best_of(lambda: backends.dumps(
+                           tree, ensure_ascii=False), repeat))
+        yield ('decode', 'json.loads, no object_hook',
+               best_of(lambda: json.loads(doc), repeat))
+        yield ('decode', 'json.loads(object_hook=decode)',
+               best_of(lambda: json.loads(doc, object_hook=plugins.decode),
+                       repeat))
+
+        # synthetic folder of json files
+        # (a folder per top level key, and a file per second level key)
+        folder = os.path.join(outfolder, 'tree')
+
+        def write_new():
+            if os.path.exists(folder):
+                shutil.rmtree(folder)
+            os.mkdir(folder)
+            edict.to_json(tree, folder, dirlevel=1)
+
+        yield ('files', 'edict.to_json(dirlevel=1), new folder',
+               best_of(write_new, repeat))
+        yield ('files', 'edict.to_json(dirlevel=1), rewrite',
+               best_of(lambda: edict.to_json(tree, folder, overwrite=True,
+                                             dirlevel=1), repeat))
+        yield ('files', 'ejson.to_dict(folder)',
+               best_of(lambda: ejson.to_dict(folder), repeat))
+        yield ('files', 'ejson.to_dict(folder, workers={})'.format(workers),
+               best_of(lambda: ejson.to_dict(folder, workers=workers),
+                       repeat))
+
+        # nested dict manipulation
+        flat = edict.flatten(tree)
+        yield ('edict', 'flatten',
+               best_of(lambda: edict.flatten(tree), repeat))
+        yield ('edict', 'unflatten',
+               best_of(lambda: edict.unflatten(flat), repeat))
+        yield ('edict', 'unflatten(deepcopy=False)',
+               best_of(lambda: edict.unflatten(flat, deepcopy=False), repeat))
+        chain = {}
+        for i in range(1000):
+            chain = {'level{}'.format(i): chain or 1}
+        yield ('edict', 'flatten, single chain of depth 1000',
+               best_of(lambda: edict.flatten(chain), repeat))
+        patterns = key_patterns()
+        yield ('edict', 'filter_keys, {} patterns'.format(len(patterns)),
+               best_of(lambda: edict.filter_keys(tree, patterns,
+                                                 use_wildcards=True), repeat))
+        yield ('edict', 'remove_keys, {} patterns'.format(len(patterns)),
+               best_of(lambda: edict.remove_keys(tree, patterns,
+                                                 use_wildcards=True), repeat))
+
+        # units schema
+        try:
+            import pint  # noqa: F401
+        except ImportError:
+            return
+        from jsonextended.units import apply_unitschema
+        data = {'g{}'.format(i): {'e{}'.format(j): 1.0 for j in range(100)}
+                for i in range(50)}
+        schema = {'g{}'.format(i): {'x{}*'.format(i): 'm'} for i in range(100)}
+        schema['*'] = {'e1?': 'eV'}
+        yield ('units', 'apply_unitschema, 5000 leaves, 101 wildcard keys',
+               best_of(lambda: apply_unitschema(data, schema,
+                                                use_wildcards=True), repeat))
+        # the synthetic tree (with all leaves set to 1.0), with a schema of
+        # 60 literal and 61 wildcard keys, which only matches a few leaves
+        # (so that matching, rather than creating quantities, dominates)
+        data = edict.unflatten({k: 1.0 for k in flat})
+        schema = {}
+        for i in range(60):
+            name = '{0}{1}'.format(_NAMES[i % len(_NAMES)], i)
+            schema[name] = {name + 'x': 'm', 'energy*': {'*9999': 'eV'}}
+        schema['mass?'] = 'kg'
+        nleaves = len(edict.flatten(data))
+        yield ('units',
+               'apply_unitschema, {0} leaves, {1} keys'.format(
+                   nleaves, len(edict.flatten(schema))),
+               best_of(lambda: apply_unitschema(data, schema,
+                                                use_wildcards=True), repeat))
+    finally:
+        shutil.rmtree(outfolder)
+
+
+def main(args=None):
+    parser = argparse.ArgumentParser(
+        description='time the performance sensitive parts of jsonextended')
+    parser.add_argument('--leaves', type=int, default=100000,
+                        help='the (minimum) number of leaves in the '
+                             'synthetic tree (default 100000)')
+    parser.add_argument('--repeat', type=int, default=3,
+                        help='report the best of this many runs (default 3)')
+    parser.add_argument('--workers', type=int, default=4,
+                        help='workers for the parallel read (default 4)')
+    parser.add_argument('--seed', type=int, default=0,
+                        help='random seed for the synthetic tree (default 0)')
+    options = parser.parse_args(args)
+
+    print('python {0}, readers: {1}, writers: {2}'.format(
+        sys.version.split()[0], *[', '.join(names)
+                                  for names in installed_backends()]))
+    group = None
+    for bgroup, name, seconds in run(options.leaves, options.repeat,
+                                     options.workers, options.seed):
+        if bgroup != group:
+            group = bgroup
+            print('\n' + group)
+        print('  {0:<52} {1:>9.4f}s'.format(name, seconds))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,344 @@
+#!/usr/bin/env python
+# -- coding: utf-8 --
+""" a module to select the package used to parse and serialise json
+
+the standard library json module is always available, and is used as the
+fallback whenever a faster backend is not installed,
+or cannot reproduce the requested behaviour
+
+- reading: by default ('auto') the first installed of orjson, simdjson or
+  ujson is used, unless an object_hook is given
+  (since the json module, calling the hook as it parses, is then faster).
+  For an explicitly selected backend, object_hook is applied as a post-pass
+  (inner objects first, as for json.load). If parse_float is not float,
+  or the backend rejects the document (e.g. NaN or very large integers),
+  the document is re-parsed with the json module,
+  so that results (and errors) are the same as for json.load
+
+- writing: by default the json module is used, since the output of other
+  backends is equivalent json but may differ in whitespace.
+  If a fast writer is selected, it is only used for indent None or 2,
+  ensure_ascii=False and no other json.dumps keywords.
+  NB: orjson writes non-finite floats as null.
+  dump with the json module encodes and writes the document in chunks,
+  whereas the fast writers build the whole string first
+
+Examples
+--------
+
+>>> from jsonextended import backends
+>>> backends.get_backend()
+('auto', 'json')
+
+>>> backends.loads('{"a": [1, 2.5, {"b": null}]}')
+{'a': [1, 2.5, {'b': None}]}
+
+>>> from decimal import Decimal
+>>> backends.loads('{"a": 1.1}', parse_float=Decimal)
+{'a': Decimal('1.1')}
+
+>>> backends.loads('{"a": {"b": 1}}',
+...                object_hook=lambda d: sorted(d.keys()))
+['a']
+
+>>> with backends.backend_context('orjson'):
+...     backends.loads('{"a": {"b": 1}}',
+...                    object_hook=lambda d: sorted(d.keys()))
+['a']
+
+>>> print(backends.dumps({'b': 1, 'a': [1, 2]}, sort_keys=True))
+{"a": [1, 2], "b": 1}
+
+>>> with backends.backend_context('json', 'json'):
+...     backends.get_backend()
+('json', 'json')
+
+>>> backends.set_backend(reader='other')
+Traceback (most recent call last):
+...
+ValueError: backend must be one of: auto, json, orjson, simdjson, ujson
+
+"""
+# internal packages
+from contextlib import contextmanager
+import json
+
+_READERS = ('orjson', 'simdjson', 'ujson')
+_WRITERS = ('orjson', 'ujson')
+_BACKENDS = ('auto', 'json') + tuple(sorted(set(_READERS + _WRITERS)))
+
+_settings = {'reader': 'auto', 'writer': 'json'}
+# (setting, name) -> (package name, module), module is None for json
+_resolved = {}
+
+
+def _import(name):
+    """ import a backend package, returning None if not installed """
+    try:
+        if name == 'orjson':
+            import orjson as module
+        elif name == 'simdjson':
+            import simdjson as module
+        elif name == 'ujson':
+            import ujson as module
+        else:
+            return None
+    except ImportError:
+        return None
+    return module
+
+
+def _resolve(setting, candidates):
+    """ get the (name, module) for a reader or writer setting """
+    name = _settings[setting]
+    key = (setting, name)
+    if key not in _resolved:
+        names = candidates if name == 'auto' else [name]
+        _resolved[key] = ('json', None)
+        for cname in names:
+            if cname not in candidates:
+                continue
+            module = _import(cname)
+            if module is not None:
+                _resolved[key] = (cname, module)
+                break
+    return _resolved[key]
+
+
+def set_backend(reader=None, writer=None):
+    """ set the backends used to read and/or write json
+
+    Parameters
+    ----------
+    reader : str or None
+        one of 'auto', 'json', 'orjson', 'simdjson', 'ujson'
+        (if the package is not installed, json is used)
+    writer : str or None
+        one of 'auto', 'json', 'orjson', 'ujson'
+        (if the package is not installed, json is used)
+
+    """
+    for setting, name in (('reader', reader), ('writer', writer)):
+        if name is None:
+            continue
+        if name not in _BACKENDS:
+            raise ValueError('backend must be one of: {}'.format(
+                ', '.join(_BACKENDS)))
+        _settings[setting] = name
+
+
+def get_backend():
+    """ get the (reader, writer) backend settings """
+    return _settings['reader'], _settings['writer']
+
+
+def active_backend():
+    """ get the (reader, writer) packages that are actually in use
+
+    Examples
+    --------
+
+    >>> with backend_context('json', 'json'):
+    ...     active_backend()
+    ('json', 'json')
+
+    """
+    return (_resolve('reader', _READERS)[0],
+            _resolve('writer', _WRITERS)[0])
+
+
+@contextmanager
+def backend_context(reader=None, writer=None):
+    """ set backends, within a context """
+    original = get_backend()
+    set_backend(reader, writer)
+    try:
+        yield
+    finally:
+        set_backend(*original)
+
+
+def _apply_hook(obj, object_hook):
+    """ apply object_hook to all dicts in obj, inner objects first """
+    def walk(obj):
+        if type(obj) is dict:
+            for key, val in obj.items():
+                vtype = type(val)
+                if vtype is dict or vtype is list:
+                    obj[key] = walk(val)
+            return object_hook(obj)
+        for i, val in enumerate(obj):
+            vtype = type(val)
+            if vtype is dict or vtype is list:
+                obj[i] = walk(val)
+        return obj
+
+    otype = type(obj)
+    if otype is dict or otype is list:
+        return walk(obj)
+    return obj
+
+
+def _fast_loads(module, name, string):
+    if name == 'simdjson':
+        # return python objects, rather than lazy proxies
+        return module.Parser().parse(string, True)
+    return module.loads(string)
+
+
+def loads(string, object_hook=None, parse_float=None):
+    """ parse a json string (or bytes)
+
+    Parameters
+    ----------
+    string : str or bytes
+    object_hook : callable
+        called with each decoded dict, and its return value used in its place
+    parse_float : callable
+        called with the string of every json float (default float)
+
+    """
+    name, module = _resolve('reader', _READERS)
+    if (module is not None and parse_float in (None, float)
+            and (object_hook is None or _settings['reader'] != 'auto')):
+        try:
+            data = _fast_loads(module, name, string)
+        except Exception:
+            # re-parse, so the result or error is that of the json module
+            pass
+        else:
+            if object_hook is not None:
+                data = _apply_hook(data, object_hook)
+            return data
+    if isinstance(string, bytes):
+        string = string.decode('utf8')
+    return json.loads(string, object_hook=object_hook,
+                      parse_float=parse_float)
+
+
+def load(file_obj, object_hook=None, parse_float=None):
+    """ parse json from a file_like object
+
+    Parameters
+    ----------
+    file_obj : file_like
+    object_hook : callable
+        called with each decoded dict, and its return value used in its place
+    parse_float : callable
+        called with the string of every json float (default float)
+
+    """
+    if (_resolve('reader', _READERS)[1] is None or
+            (object_hook is not None and _settings['reader'] == 'auto')):
+        return json.load(file_obj, object_hook=object_hook,
+                         parse_float=parse_float)
+    return loads(file_obj.read(), object_hook=object_hook,
+                 parse_float=parse_float)
+
+
+def _fast_dumps(module, name, obj, sort_keys, indent, default):
+    if name == 'orjson':
+        # as for json, these are passed to default
+        option = (module.OPT_PASSTHROUGH_DATACLASS
+                  | module.OPT_PASSTHROUGH_DATETIME)
+        if sort_keys:
+            option |= module.OPT_SORT_KEYS
+        if indent == 2:
+            option |= module.OPT_INDENT_2
+        return module.dumps(obj, default=default,
+                            option=option).decode('utf8')
+    kwargs = {'sort_keys': sort_keys, 'ensure_ascii': False,
+              'escape_forward_slashes': False, 'indent': indent or 0}
+    if default is not None:
+        kwargs['default'] = default
+    return module.dumps(obj, **kwargs)
+
+
+def dumps(obj, sort_keys=False, indent=None, default=None,
+          ensure_ascii=True, **kwargs):
+    """ serialise obj to a json string
+
+    Parameters
+    ----------
+    obj : object
+    sort_keys : bool
+        if true then the output of dictionaries will be sorted by key
+    indent : int
+        if non-negative integer, then JSON array elements and object members
+        will be pretty-printed on new lines with that indent level spacing.
+    default : callable
+        called with objects that cannot otherwise be serialised
+    ensure_ascii : bool
+        escape all non-ASCII characters
+    kwargs : dict
+        other keywords for json.dumps
+
+    """
+    name, module = _resolve('writer', _WRITERS)
+    if (module is not None and not kwargs and not ensure_ascii
+            and indent in (None, 2)):
+        try:
+            return _fast_dumps(module, name, obj, sort_keys, indent, default)
+        except Exception:
+            # e.g. non-string keys or integers larger than 64-bit
+            pass
+    return json.dumps(obj, sort_keys=sort_keys, indent=indent,
+                      default=default, ensure_ascii=ensure_ascii, **kwargs)
+
+
+def dump(obj, file_obj, sort_keys=False, indent=None, default=None,
+         ensure_ascii=True, buffer_size=2**16, **kwargs):
+    """ serialise obj to a file_like object (see dumps)
+
+    with the json module, the document is encoded incrementally,
+    and written in chunks of roughly buffer_size characters,
+    so that the whole string is never held in memory.
+    The chunks are always written as text (unicode in python 2)
+
+    Examples
+    --------
+
+    >>> from io import StringIO
+    >>> stream = StringIO()
+    >>> dump({'b': [1, 2], 'a': None}, stream, sort_keys=True, indent=1,
+    ...      buffer_size=4)
+    >>> print(stream.getvalue())
+    {
+     "a": null,
+     "b": [
+      1,
+      2
+     ]
+    }
+
+    """
+    name, module = _resolve('writer', _WRITERS)
+    if (module is not None and not kwargs and not ensure_ascii
+            and indent in (None, 2)):
+        try:
+            string = _fast_dumps(module, name, obj, sort_keys, indent, default)
+        except Exception:
+            pass
+        else:
+            if isinstance(string, bytes):
+                string = string.decode('utf8')
+            file_obj.write(string)
+            return
+
+    encoder = kwargs.pop('cls', None) or json.JSONEncoder
+    # python 2 encodes to str, but io text files require unicode
+    to_text = str is bytes
+    chunks = []
+    size = 0
+    for chunk in encoder(sort_keys=sort_keys, indent=indent, default=default,
+                         ensure_ascii=ensure_ascii, **kwargs).iterencode(obj):
+        if to_text and isinstance(chunk, bytes):
+            chunk = chunk.decode('utf8')
+        chunks.append(chunk)
+        size += len(chunk)
+        if size >= buffer_size:
+            file_obj.write(''.join(chunks))
+            chunks = []
+            size = 0
+    if chunks:
+        file_obj.write(''.join(chunks))
@@ -6,14 +6,20 @@
 """
 # internal packages
 import copy
+import hashlib
+import io
 import json
+import os
 import re
 import logging
+import multiprocessing
 import sys
+import tempfile
 import textwrap
 import uuid
-from fnmatch import fnmatch
-from functools import reduce, total_ordering
+from contextlib import contextmanager
+from fnmatch import fnmatch, translate
+from functools import total_ordering
 import warnings
 warnings.simplefilter('once', ImportWarning)
 logger = logging.getLogger(__name__)
@@ -35,11 +41,21 @@ try:
     from urllib2 import urlopen
 except ImportError:
     from urllib.request import urlopen
+try:
+    _replace = os.replace
+except AttributeError:
+    def _replace(src, dst):
+        """ rename src to dst, replacing dst if it exists """
+        if os.name == 'nt' and os.path.exists(dst):
+            os.remove(dst)
+        os.rename(src, dst)
 
 # local imports
+from jsonextended import backends  # noqa: E402
 from jsonextended.utils import natural_sort, colortxt  # noqa: E402
 from jsonextended.plugins import (
     encode, decode, parse, parser_available)  # noqa: E402
+from jsonextended.plugins import _worker_initializer  # noqa: E402
 
 
 def is_iter_non_string(obj):
@@ -471,53 +487,209 @@ def flatten(d, key_as_tuple=True, sep='.', list_of_dicts=None, all_iters=None):
      ('__iter__1', 'b', '__iter__0'): 1,
      ('__iter__1', 'b', '__iter__1'): 2}
 
+    >>> d = deep = {}
+    >>> for i in range(5000):
+    ...     deep['a'] = {}
+    ...     deep = deep['a']
+    >>> deep['b'] = 1
+    >>> [len(key) for key in flatten(d)]
+    [5001]
+
     """
+    return dict(iflatten(d, key_as_tuple, sep, list_of_dicts, all_iters))
+
+
+def iflatten(d, key_as_tuple=True, sep='.', list_of_dicts=None,
+             all_iters=None):
+    """ iterate over the (key, value) leaves of a nested dict, depth first,
+    where key is tuple/string of all nested keys
+    (the lazy equivalent of flatten(d).items())
+
+    Parameters
+    ----------
+    d : object
+    key_as_tuple : bool
+        whether keys are list of nested keys or delimited string of nested keys
+    sep : str
+        if key_as_tuple=False, delimiter for keys
+    list_of_dicts: str or None
+        if not None, flatten lists of dicts using this prefix
+    all_iters: str or None
+        if not None, flatten all lists and tuples using this prefix
+
+    Examples
+    --------
+
+    >>> d = {1:{"a":"A", "b":{}}, 2:{"c":"C"}}
+    >>> for key, val in iflatten(d):
+    ...     print(key, val)
+    (1, 'a') A
+    (2, 'c') C
+
+    >>> list(iflatten(d, key_as_tuple=False))
+    [('1.a', 'A'), ('2.c', 'C')]
+
+    >>> iflatten(1)
+    Traceback (most recent call last):
+    ...
+    TypeError: d is not dict like: 1
+
+    """
+    items = _iter_flatten(d, list_of_dicts, all_iters)
+    if key_as_tuple:
+        return items
+    return ((key[0] if len(key) == 1 else sep.join([str(k) for k in key]),
+             value) for key, value in items)
+
 
-    def expand(key, value):
+def _iter_flatten(d, list_of_dicts=None, all_iters=None):
+    """ get an iterator of the (key_tuple, value) leaves of d, depth first
+
+    an explicit stack of item iterators is used (rather than recursion),
+    so that each key prefix is only built once and there is no limit on depth
+
+    """
+    def branches(value):
+        """ get an iterator of (key, value) for a branch, or None if a leaf """
         if is_dict_like(value):
-            flatten_dict = flatten(value, key_as_tuple, sep,
-                                   list_of_dicts, all_iters)
-            if key_as_tuple:
-                return [(key + k, v) for k, v in flatten_dict.items()]
-            else:
-                return [(str(key) + sep + k, v)
-                        for k, v in flatten_dict.items()]
-        elif is_iter_non_string(value) and all_iters is not None:
-            value = {'{0}{1}'.format(all_iters, i): v
-                     for i, v in enumerate(value)}
-            flatten_dict = flatten(value, key_as_tuple, sep,
-                                   list_of_dicts, all_iters)
-            if key_as_tuple:
-                return [(key + k, v) for k, v in flatten_dict.items()]
-            else:
-                return [(str(key) + sep + k, v)
-                        for k, v in flatten_dict.items()]
-        elif is_list_of_dict_like(value) and list_of_dicts is not None:
-            value = {'{0}{1}'.format(list_of_dicts, i): v
-                     for i, v in enumerate(value)}
-            flatten_dict = flatten(value, key_as_tuple, sep,
-                                   list_of_dicts, all_iters)
-            if key_as_tuple:
-                return [(key + k, v) for k, v in flatten_dict.items()]
+            return iter(value.items())
+        elif all_iters is not None and is_iter_non_string(value):
+            return (('{0}{1}'.format(all_iters, i), v)
+                    for i, v in enumerate(value))
+        elif list_of_dicts is not None and is_list_of_dict_like(value):
+            return (('{0}{1}'.format(list_of_dicts, i), v)
+                    for i, v in enumerate(value))
+        return None
+
+    def walk(items):
+        stack = [((), items)]
+        while stack:
+            prefix, items = stack[-1]
+            for key, value in items:
+                path = prefix + (key,)
+                sub_items = branches(value)
+                if sub_items is None:
+                    yield path, value
+                else:
+                    stack.append((path, sub_items))
+                    break
             else:
-                return [(str(key) + sep + k, v)
-                        for k, v in flatten_dict.items()]
-        else:
-            return [(key, value)]
+                stack.pop()
 
-    if is_iter_non_string(d) and all_iters is not None:
-        d = {'{0}{1}'.format(all_iters, i): v for i, v in enumerate(d)}
-    elif is_list_of_dict_like(d) and list_of_dicts is not None:
-        d = {'{0}{1}'.format(list_of_dicts, i): v for i, v in enumerate(d)}
-    elif not is_dict_like(d):
+    items = branches(d)
+    if items is None:
         raise TypeError('d is not dict like: {}'.format(d))
+    return walk(items)
 
-    if key_as_tuple:
-        items = [item for k, v in d.items() for item in expand((k,), v)]
-    else:
-        items = [item for k, v in d.items() for item in expand(k, v)]
 
-    return dict(items)
+def _glob_regex(pattern):
+    r""" translate an fnmatch pattern, normalised with os.path.normcase,
+    to a regex without its end anchor (or, on python 2, its flags)
+
+    Examples
+    --------
+
+    >>> import re
+    >>> regex = re.compile(r'(?s)(?:{})\Z'.format(_glob_regex('a*b?')))
+    >>> [bool(regex.match(k)) for k in ['axxbc', 'a\nbc', 'ab']]
+    [True, True, False]
+
+    """
+    regex = translate(os.path.normcase(pattern))
+    for end in ('\\Z(?ms)', '\\Z'):  # python 2, python 3
+        if regex.endswith(end):
+            return regex[:-len(end)]
+    return regex
+
+
+def _compile_patterns(patterns, use_wildcards=True):
+    """ split patterns into (literals, unhashable, regexes)
+
+    literals is the set of hashable patterns (with string patterns
+    also added normalised with os.path.normcase, if use_wildcards),
+    unhashable the list of other patterns and regexes the _glob_regex
+    of each string pattern containing a wildcard (if use_wildcards)
+
+    Examples
+    --------
+
+    >>> literals, unhashable, regexes = _compile_patterns(['a', 'b*', [1]])
+    >>> sorted(literals), unhashable, len(regexes)
+    (['a', 'b*'], [[1]], 1)
+    >>> literals, unhashable, regexes = _compile_patterns(
+    ...     ['b*'], use_wildcards=False)
+    >>> sorted(literals), unhashable, regexes
+    (['b*'], [], [])
+
+    """
+    literals = set()
+    unhashable = []
+    regexes = []
+    for pattern in patterns:
+        try:
+            literals.add(pattern)
+        except TypeError:
+            unhashable.append(pattern)
+        if use_wildcards and isinstance(pattern, basestring):
+            if any([c in pattern for c in '*?[']):
+                regexes.append(_glob_regex(pattern))
+            else:
+                literals.add(os.path.normcase(pattern))
+    return literals, unhashable, regexes
+
+
+def _key_matcher(patterns, use_wildcards=True):
+    """ get a function, match(key) -> bool, which tests if a key is equal to,
+    or (if use_wildcards) matches with fnmatch, any of the patterns
+
+    patterns are compiled once (with _compile_patterns), with the (hashable)
+    literals tested by set membership and all wildcard patterns combined
+    into a single regex
+
+    Examples
+    --------
+
+    >>> match = _key_matcher(['a', 1, 'b*', 'c?d'])
+    >>> [match(k) for k in ['a', 1, 'bxx', 'cxd', 'cd', 2, None]]
+    [True, True, True, True, False, False, False]
+
+    >>> match = _key_matcher(['b*'], use_wildcards=False)
+    >>> match('bxx'), match('b*')
+    (False, True)
+
+    """
+    literals, unhashable, regexes = _compile_patterns(patterns, use_wildcards)
+    regex = None
+    if regexes:
+        regex = re.compile('(?s)(?:{})\\Z'.format(
+            '|'.join(['(?:{})'.format(r) for r in regexes])))
+
+    def match(key):
+        try:
+            if key in literals:
+                return True
+        except TypeError:
+            pass
+        for pattern in unhashable:
+            try:
+                if key == pattern:
+                    return True
+            except Exception:
+                pass
+        if use_wildcards and isinstance(key, basestring):
+            key = os.path.normcase(key)
+            if key in literals:
+                return True
+            if regex is not None and regex.match(key):
+                return True
+        return False
+
+    return match
+
+
+# values that deepcopy would return unchanged
+_ATOMIC_TYPES = set([bool, int, float, complex, type(None),
+                     str, bytes, unicode])
 
 
 def _startswith(k, prefix):
@@ -580,20 +752,89 @@ def unflatten(d, key_as_tuple=True, delim='.',
     """
     if not d:
         return d
+    return iunflatten(d.items(), key_as_tuple, delim,
+                      list_of_dicts, deepcopy)
 
-    if deepcopy:
-        try:
-            d = copy.deepcopy(d)
-        except Exception:
-            warnings.warn(
-                'error in deepcopy, so using references to input dict')
 
-    if key_as_tuple:
-        result = d.pop(()) if () in d else {}
+def _unflatten_conflict(result, parts, value):
+    """ raise the KeyError of iunflatten,
+    for a path that passes through a leaf
+    """
+    d = result
+    for i, part in enumerate(parts[:-1]):
+        if not is_dict_like(d):
+            break
+        d = d[part]
     else:
-        result = d.pop('') if '' in d else {}
+        i = len(parts) - 1
+    branch = value
+    for subpart in reversed(parts[i:]):
+        branch = {subpart: branch}
+    v1, v2 = sorted([str(d), str(branch)])
+    raise KeyError("child conflict for path: "
+                   "{0}; {1} and {2}".format(parts[:i], v1, v2))
+
 
-    for key, value in d.items():
+def iunflatten(items, key_as_tuple=True, delim='.',
+               list_of_dicts=None, deepcopy=True, overwrite=False):
+    r""" build a nested dict from an iterable of (key, value) pairs,
+    with keys as tuples or delimited strings
+    (so that items can be streamed, e.g. from iflatten)
+
+    Parameters
+    ----------
+    items : iterable of (key, value)
+    key_as_tuple : bool
+        if true, keys are tuples, else, keys are delimited strings
+    delim : str
+        if keys are strings, then split by delim
+    list_of_dicts: str or None
+        if key starts with this treat as a list
+    deepcopy: bool
+        deepcopy values, if False values are shared by reference
+        with the input (so should be treated as immutable)
+    overwrite: bool
+        if true, a later (non-dict) value replaces an earlier one
+        at the same path, rather than raising a KeyError
+
+    Notes
+    -----
+    the parent dict of the previous key is kept, so that runs of sibling
+    keys (e.g. depth first items, such as from iflatten) are inserted
+    without looking up their path again
+
+    Examples
+    --------
+
+    >>> from pprint import pprint
+
+    >>> d = {'a':{'b':1,'c':2},'d':3}
+    >>> pprint(iunflatten((k, v) for k, v in iflatten(d) if k[-1] != 'c'))
+    {'a': {'b': 1}, 'd': 3}
+
+    >>> iunflatten([(('a',), 1), (('a',), 2)])
+    Traceback (most recent call last):
+    ...
+    KeyError: "child conflict for path: ('a',); 1 and 2"
+
+    >>> iunflatten([(('a',), 1), (('a',), 2)], overwrite=True)
+    {'a': 2}
+
+    >>> iunflatten([(('a', 'b'), 1), (('a', 'b', 'c', 'd'), 2)])
+    Traceback (most recent call last):
+    ...
+    KeyError: "child conflict for path: ('a', 'b'); 1 and {'c': {'d': 2}}"
+
+    >>> leaf = [1, 2]
+    >>> iunflatten([(('a', 'b'), leaf)], deepcopy=False)['a']['b'] is leaf
+    True
+
+    """
+    result = {}
+    has_root = False
+    parent_path = parent = None
+
+    for key, value in items:
 
         if not isinstance(key, tuple) and key_as_tuple:
             raise ValueError(
@@ -602,29 +843,65 @@ def unflatten(d, key_as_tuple=True, delim='.',
             raise ValueError(
                 'key not string and key_as_tuple set to False: {}'.format(key))
         elif isinstance(key, basestring) and not key_as_tuple:
-            parts = key.split(delim)
+            parts = key.split(delim) if key else ()
         else:
             parts = key
 
-        d = result
-        for part in parts[:-1]:
-            if part not in d:
-                d[part] = {}
-            d = d[part]
-        if not is_dict_like(d):
-            v1, v2 = sorted([str(d), str({parts[-1]: value})])
-            raise KeyError("child conflict for path: "
-                           "{0}; {1} and {2}".format(parts[:-1], v1, v2))
-        elif parts[-1] in d:
+        if deepcopy and type(value) not in _ATOMIC_TYPES:
             try:
-                value = merge([d[parts[-1]], value])
+                value = copy.deepcopy(value)
             except Exception:
-                v1, v2 = sorted([str(value), str(d[parts[-1]])])
+                warnings.warn(
+                    'error in deepcopy, so using references to input dict')
+
+        if not parts:
+            if not has_root and not result:
+                result = value
+            else:
+                try:
+                    result = merge([value, result])
+                except Exception:
+                    v1, v2 = sorted([str(value), str(result)])
+                    raise KeyError("child conflict for path: "
+                                   "{0}; {1} and {2}".format(key, v1, v2))
+            has_root = True
+            parent_path = parent = None
+            continue
+
+        if parts[:-1] == parent_path:
+            d = parent
+        else:
+            d = result
+            for part in parts[:-1]:
+                if type(d) is not dict and not is_dict_like(d):
+                    break
+                if part not in d:
+                    d[part] = {}
+                d = d[part]
+            if type(d) is not dict and not is_dict_like(d):
+                _unflatten_conflict(result, parts, value)
+            parent_path, parent = parts[:-1], d
+
+        last = parts[-1]
+        if last in d:
+            current = d[last]
+            if is_dict_like(current) and is_dict_like(value):
+                try:
+                    value = merge([current, value])
+                except Exception:
+                    v1, v2 = sorted([str(value), str(current)])
+                    raise KeyError("child conflict for path: "
+                                   "{0}; {1} and {2}".format(parts, v1, v2))
+                # the cached parent may have been replaced by the merge
+                parent_path = parent = None
+            elif not (overwrite and not is_dict_like(current)
+                      and not is_dict_like(value)):
+                v1, v2 = sorted([str(value), str(current)])
                 raise KeyError("child conflict for path: "
                                "{0}; {1} and {2}".format(parts, v1, v2))
-        d[parts[-1]] = value
+        d[last] = value
 
-    if list_of_dicts is not None:
+    if list_of_dicts is not None and (result or has_root):
         result = _recreate_lists(result, list_of_dicts)
         # if is_dict_like(result):
         #    if all([str(k).startswith(list_of_dicts) for k in result.keys()]):
@@ -634,64 +911,179 @@ def unflatten(d, key_as_tuple=True, delim='.',
     return result
 
 
-def _single_merge(a, b, error_path=None, overwrite=False,
-                  append=False, list_of_dicts=False):
-    """merges b into a
+def _is_dict(obj):
+    """ is_dict_like, with a fast path for dict instances """
+    return isinstance(obj, dict) or is_dict_like(obj)
+
+
+# an overwrite mode, which raises a _MergeConflict rather than replacing
+# a branch by a leaf (or vice versa), since the result of that depends on
+# the order of merging, and so differs when partial merges are combined
+_OVERWRITE_LEAVES = 'leaves'
+
+
+def _replaces_branch(a, b, append, list_of_dicts):
+    for obj in (a, b):
+        if _is_dict(obj) or (isinstance(obj, list)
+                             and (append or list_of_dicts)):
+            return True
+    return False
+
+
+class _MergeConflict(Exception):
+    """ raised by the merge functions, with the path (in reverse)
+    added to as the error propagates, so no path is built unless it fails
     """
-    if error_path is None:
-        error_path = []
 
+    def __init__(self, message, old, new):
+        super(_MergeConflict, self).__init__(message)
+        self.message = message
+        self.old = old
+        self.new = new
+        self.rpath = []
+
+    def to_error(self):
+        return ValueError('{0} at "{1}": old: {2}, new: {3}'.format(
+            self.message, '.'.join(reversed(self.rpath)), self.old, self.new))
+
+
+def _merge_pair(a, b, owned, overwrite, append, list_of_dicts):
+    """ return the merge of b into a,
+    only copying (and then modifying) dicts that are not in owned,
+    a dict of {id: dict}, which keeps the copies alive,
+    so their ids cannot be reused by other dicts
+    """
+    if _is_dict(a) and _is_dict(b):
+        if owned.get(id(a)) is not a:
+            a = copy.copy(a)
+            owned[id(a)] = a
+        for key, bval in b.items():
+            if key not in a:
+                a[key] = bval
+                continue
+            aval = a[key]
+            try:
+                new = _merge_pair(aval, bval, owned,
+                                  overwrite, append, list_of_dicts)
+            except _MergeConflict as err:
+                err.rpath.append(str(key))
+                raise
+            if new is not aval:
+                a[key] = new
+        return a
+    if isinstance(a, list) and isinstance(b, list) and append:
+        return a + b
     if list_of_dicts and is_list_of_dict_like(a) and is_list_of_dict_like(b):
         if len(a) != len(b):
-            raise ValueError(
-                'list of dicts are of different lengths at '
-                '"{0}": old: {1}, new: {2}'.format('.'.join(error_path), a, b))
-        return [_single_merge(a_item, b_item,
-                              error_path + ["iter_{}".format(i)],
-                              overwrite, append, list_of_dicts)
-                for i, (a_item, b_item) in enumerate(zip(a, b))]
-
-    for key in b:
-        if key in a:
-            if is_dict_like(a[key]) and is_dict_like(b[key]):
-                _single_merge(a[key], b[key], error_path +
-                              [str(key)], overwrite, append, list_of_dicts)
-            elif (isinstance(a[key], list)
-                  and isinstance(b[key], list) and append):
-                a[key] += b[key]
-            elif (list_of_dicts
-                  and is_list_of_dict_like(a[key])
-                  and is_list_of_dict_like(b[key])):
-                if len(a[key]) != len(b[key]):
-                    raise ValueError(
-                        'list of dicts are of different lengths at '
-                        '"{0}": old: {1}, new: {2}'.format(
-                            '.'.join(error_path + [str(key)]), a[key], b[key]))
-                for i, (a_item, b_item) in enumerate(zip(a[key], b[key])):
-                    _single_merge(a_item, b_item,
-                                  error_path + [str(key), "iter_{}".format(i)],
-                                  overwrite, append, list_of_dicts)
-            elif a[key] == b[key]:
-                pass  # same leaf value
-            elif overwrite:
-                a[key] = b[key]
-            else:
-                raise ValueError(
-                    'different data already exists at '
-                    '"{0}": old: {1}, new: {2}'.format(
-                        '.'.join(error_path + [str(key)]), a[key], b[key]))
+            raise _MergeConflict(
+                'list of dicts are of different lengths', a, b)
+        new = []
+        for i, (aitem, bitem) in enumerate(zip(a, b)):
+            try:
+                new.append(_merge_pair(aitem, bitem, owned,
+                                       overwrite, append, list_of_dicts))
+            except _MergeConflict as err:
+                err.rpath.append('iter_{}'.format(i))
+                raise
+        return new
+    if a == b:
+        return a  # same leaf value
+    if overwrite:
+        if (overwrite == _OVERWRITE_LEAVES
+                and _replaces_branch(a, b, append, list_of_dicts)):
+            raise _MergeConflict('branch replaced', a, b)
+        return b
+    raise _MergeConflict('different data already exists', a, b)
+
+
+def _merge_all(values, overwrite, append, list_of_dicts):
+    """ merge a list of values in a single traversal,
+    grouping the values of each key across all dicts,
+    or raise a _MergeConflict (without a path)
+    """
+    first = values[0]
+    for val in values:
+        if not _is_dict(val):
+            break
+    else:
+        new = copy.copy(first)
+        # the values of keys in more than one dict
+        groups = {}
+        for val in values[1:]:
+            for key, sub in val.items():
+                if key in groups:
+                    groups[key].append(sub)
+                elif key in new:
+                    groups[key] = [new[key], sub]
+                else:
+                    new[key] = sub
+        for key, group in groups.items():
+            new[key] = _merge_all(group, overwrite, append, list_of_dicts)
+        return new
+
+    # fold in order, merging each run of dicts (or lists of dicts) at once
+    # (values of leaf_types can only be compared)
+    leaf_types = (_ATOMIC_TYPES if append or list_of_dicts
+                  else _ATOMIC_TYPES.union([list]))
+    acc = first
+    i = 1
+    while i < len(values):
+        val = values[i]
+        if type(acc) in leaf_types and type(val) in leaf_types:
+            if acc != val:
+                if not overwrite:
+                    raise _MergeConflict(
+                        'different data already exists', acc, val)
+                acc = val
+        elif _is_dict(acc) and _is_dict(val):
+            j = i
+            while j < len(values) and _is_dict(values[j]):
+                j += 1
+            acc = _merge_all([acc] + values[i:j],
+                             overwrite, append, list_of_dicts)
+            i = j
+            continue
+        elif isinstance(acc, list) and isinstance(val, list) and append:
+            acc = acc + val
+        elif (list_of_dicts and is_list_of_dict_like(acc)
+              and is_list_of_dict_like(val)):
+            j = i
+            while (j < len(values) and is_list_of_dict_like(values[j])
+                   and not (append and isinstance(values[j], list))):
+                if len(values[j]) != len(acc):
+                    raise _MergeConflict(
+                        'list of dicts are of different lengths', acc, val)
+                j += 1
+            acc = [_merge_all(list(items), overwrite, append, list_of_dicts)
+                   for items in zip(acc, *values[i:j])]
+            i = j
+            continue
+        elif acc == val:
+            pass
+        elif overwrite:
+            if (overwrite == _OVERWRITE_LEAVES
+                    and _replaces_branch(acc, val, append, list_of_dicts)):
+                raise _MergeConflict('branch replaced', acc, val)
+            acc = val
         else:
-            a[key] = b[key]
-    return a
+            raise _MergeConflict('different data already exists', acc, val)
+        i += 1
+    return acc
 
 
 def merge(dicts, overwrite=False, append=False, list_of_dicts=False):
     """ merge dicts,
     starting with dicts[1] into dicts[0]
 
+    the inputs are not modified, and only the branches that differ
+    from the input they came from are copied,
+    so the result shares other sub-dicts and values with the inputs.
+    A list (or tuple) of dicts is merged in a single traversal,
+    any other iterable (e.g. a generator) is consumed one dict at a time
+
     Parameters
     ----------
-    dicts : list[dict]
+    dicts : list[dict] or iterable[dict]
         list of dictionaries
     overwrite : bool
         if true allow overwriting of current data
@@ -739,18 +1131,139 @@ def merge(dicts, overwrite=False, append=False, list_of_dicts=False):
     >>> pprint(merge([{'a':[{"b": 1}, {"c": 2}]}, {'a':[{"d": 3}, {"e": 4}]}], list_of_dicts=True))
     {'a': [{'b': 1, 'd': 3}, {'c': 2, 'e': 4}]}
 
-    """  # noqa: E501
-    outdict = copy.deepcopy(dicts[0])
+    >>> pprint(merge(({'a': i} for i in range(3)), overwrite=True))
+    {'a': 2}
+
+    >>> makers = [lambda i: {'a': {'x': i}}, lambda i: {'a': {'y': i}},
+    ...           lambda i: {'a': i}, lambda i: {'a': {'z': i}}]
+    >>> inputs = []
+    >>> def dicts():
+    ...     for i in range(40):
+    ...         inputs.append(makers[i % 4](i))
+    ...         yield inputs[-1]
+    >>> merge(dicts(), overwrite=True)
+    {'a': {'z': 39}}
+    >>> all([len(d['a']) == 1 for d in inputs if is_dict_like(d['a'])])
+    True
 
-    def single_merge(a, b):
-        return _single_merge(a, b, overwrite=overwrite, append=append,
-                             list_of_dicts=list_of_dicts)
+    >>> d1 = {1:{"a":"A"},2:{"b":"B"}}
+    >>> merged = merge([d1, {2:{"c":"C"}}])
+    >>> merged[1] is d1[1], merged[2] is d1[2]
+    (True, False)
+    >>> pprint(d1)
+    {1: {'a': 'A'}, 2: {'b': 'B'}}
+
+    """  # noqa: E501
+    if isinstance(dicts, (list, tuple)):
+        if not dicts:
+            return {}
+        try:
+            return _merge_all(list(dicts), overwrite, append, list_of_dicts)
+        except _MergeConflict:
+            # merge pairwise, to report the first conflict in input order
+            dicts = iter(dicts)
+    else:
+        dicts = iter(dicts)
 
-    reduce(single_merge, [outdict] + dicts[1:])
+    try:
+        outdict = copy.copy(next(dicts))
+    except StopIteration:
+        return {}
+    owned = {id(outdict): outdict}
+    for new in dicts:
+        try:
+            outdict = _merge_pair(outdict, new, owned,
+                                  overwrite, append, list_of_dicts)
+        except _MergeConflict as err:
+            raise err.to_error()
 
     return outdict
 
 
+def _merge_chunk(args):
+    """ merge a chunk of dicts, for merge_parallel,
+    returning (success, merged)
+    """
+    dicts, overwrite, append, list_of_dicts = args
+    try:
+        return True, _merge_all(dicts, overwrite, append, list_of_dicts)
+    except _MergeConflict:
+        return False, None
+
+
+def merge_parallel(dicts, processes=None, chunksize=None,
+                   overwrite=False, append=False, list_of_dicts=False):
+    """ merge dicts (as for merge), with a pool of processes
+
+    the dicts are split into contiguous chunks, which are merged
+    in parallel, then the partial results are merged in order.
+    If any of these merges fail, or (with overwrite) would replace
+    a branch by a leaf, so that the result could depend on the chunks,
+    the dicts are merged serially instead,
+    so that results and errors are always those of merge.
+    Since the partial results are copied back from the workers,
+    the result shares no values with the inputs.
+    NB: the dicts are pickled to and from the workers, so this is only
+    faster than merge when that is cheap compared to merging them
+
+    Parameters
+    ----------
+    dicts : list[dict] or iterable[dict]
+        list of dictionaries (which must be picklable)
+    processes : int or None
+        the number of worker processes (if None, the number of cpus)
+    chunksize : int or None
+        the number of dicts in each chunk (if None, one chunk per process)
+    overwrite : bool
+        if true allow overwriting of current data
+    append : bool
+        if true and items are both lists, then add them
+    list_of_dicts: bool
+        treat list of dicts as additional branches
+
+    Examples
+    --------
+
+    >>> from pprint import pprint
+    >>> dicts = [{'a': {i: i}} for i in range(4)]
+    >>> pprint(merge_parallel(dicts, processes=2))
+    {'a': {0: 0, 1: 1, 2: 2, 3: 3}}
+
+    >>> merge_parallel([{'a': 1}, {'b': 2}, {'a': 3}], processes=2)
+    Traceback (most recent call last):
+    ...
+    ValueError: different data already exists at "a": old: 1, new: 3
+
+    """
+    dicts = list(dicts)
+    if processes is None:
+        processes = multiprocessing.cpu_count()
+    if chunksize is None:
+        chunksize = -(-len(dicts) // max(processes, 1))
+    chunksize = max(chunksize, 1)
+    if processes <= 1 or len(dicts) <= chunksize:
+        return merge(dicts, overwrite, append, list_of_dicts)
+
+    mode = _OVERWRITE_LEAVES if overwrite else False
+    jobs = [(dicts[i:i + chunksize], mode, append, list_of_dicts)
+            for i in range(0, len(dicts), chunksize)]
+    pool = multiprocessing.Pool(processes)
+    try:
+        results = pool.map(_merge_chunk, jobs)
+    finally:
+        pool.close()
+        pool.join()
+
+    if all([success for success, _ in results]):
+        try:
+            return _merge_all([partial for _, partial in results],
+                              mode, append, list_of_dicts)
+        except _MergeConflict:
+            pass
+    # merge serially, to give the same result or error as merge
+    return merge(dicts, overwrite, append, list_of_dicts)
+
+
 def flattennd(d, levels=0, key_as_tuple=True, delim='.',
               list_of_dicts=None):
     """ get nested dict as {key:dict,...},
@@ -871,6 +1384,235 @@ def flatten2d(d, key_as_tuple=True, delim='.',
     return flattennd(d, 1, key_as_tuple, delim, list_of_dicts=list_of_dicts)
 
 
+def _edit_in_place(d, edit, list_of_dicts=False, children_first=False):
+    """ call edit(node, path) on every dict in d, and return d
+
+    by default parents are edited before their children,
+    which are collected beforehand, so edit may move, wrap or replace them
+    without them being revisited. edit may also return the list of
+    (child, path) to descend into instead (e.g. to prune branches).
+    If children_first, each dict is edited after all of its children,
+    so values that edit moves elsewhere have already been edited.
+    A dict found at several paths is only edited (and descended into)
+    at the first of them
+
+    """
+    # id -> dict, holding a reference so that ids are not reused
+    seen = {}
+    stack = [(d, (), False)]
+    while stack:
+        node, path, edit_now = stack.pop()
+        if edit_now:
+            edit(node, path)
+        elif is_dict_like(node):
+            if id(node) in seen:
+                continue
+            seen[id(node)] = node
+            children = [(v, path + (k,)) for k, v in node.items()]
+            if children_first:
+                stack.append((node, path, True))
+            else:
+                descend = edit(node, path)
+                if descend is not None:
+                    children = descend
+            stack.extend([(v, p, False) for v, p in reversed(children)])
+        elif list_of_dicts and is_list_of_dict_like(node):
+            stack.extend([(v, path + ('__list__{}'.format(i),), False)
+                          for i, v in reversed(list(enumerate(node)))])
+    return d
+
+
+class PathIndex(object):
+    """ an index of the leaf paths of a nested dict,
+    which can be passed to the filter functions (filter_keys, filter_paths,
+    filter_values, filter_keyvals and filter_keyfuncs) in place of the dict,
+    so that repeated queries do not re-flatten it
+
+    the leaves are stored in depth first order, with the (start, end) range
+    of leaves below each path prefix, and inverted indexes of;
+    key (at any depth) -> path prefixes, leaf key -> leaves and
+    (hashable) leaf value -> leaves
+
+    Parameters
+    ----------
+    d : dict
+    list_of_dicts: bool
+        treat list of dicts as additional branches
+
+    Notes
+    -----
+    the index holds references to the leaf values of d
+    and is not updated if d is changed
+
+    Examples
+    --------
+
+    >>> from pprint import pprint
+    >>> d = {'a':{'b':1,'c':{'d':2}},'e':{'c':3,'b':1}}
+    >>> index = PathIndex(d)
+    >>> len(index)
+    4
+    >>> pprint(filter_keys(index, ['c']))
+    {'a': {'c': {'d': 2}}, 'e': {'c': 3}}
+    >>> pprint(filter_paths(index, [('c', 'd')]))
+    {'a': {'c': {'d': 2}}}
+    >>> pprint(filter_values(index, [1]))
+    {'a': {'b': 1}, 'e': {'b': 1}}
+    >>> pprint(filter_keyvals(index, {'b': 1, 'c': 3}, logic="AND"))
+    {'e': {'b': 1, 'c': 3}}
+
+    """
+
+    def __init__(self, d, list_of_dicts=False):
+        self.list_of_dicts = '__list__' if list_of_dicts else None
+        self._paths = paths = []
+        self._values = values = []
+        # path prefix -> [start, end)
+        self._ranges = ranges = {}
+        # key -> path prefixes ending with key
+        self._keys = keys = {}
+        # leaf key -> positions
+        self._leafkeys = leafkeys = {}
+        # hashable leaf value -> positions
+        self._leafvalues = leafvalues = {}
+        self._unhashable = []
+
+        # the prefixes of the previous path, which have not been closed
+        open_prefixes = [()]
+        ranges[()] = [0, 0]
+        prev = ()
+        for pos, (path, value) in enumerate(
+                iflatten(d, list_of_dicts=self.list_of_dicts)):
+            common = 0
+            limit = min(len(prev), len(path))
+            while common < limit and prev[common] == path[common]:
+                common += 1
+            for prefix in open_prefixes[common + 1:]:
+                ranges[prefix][1] = pos
+            del open_prefixes[common + 1:]
+            for i in range(common + 1, len(path) + 1):
+                prefix = path[:i]
+                ranges[prefix] = [pos, None]
+                keys.setdefault(path[i - 1], []).append(prefix)
+                open_prefixes.append(prefix)
+            prev = path
+
+            paths.append(path)
+            values.append(value)
+            leafkeys.setdefault(path[-1], []).append(pos)
+            try:
+                leafvalues.setdefault(value, []).append(pos)
+            except TypeError:
+                self._unhashable.append(pos)
+
+        for prefix in open_prefixes:
+            ranges[prefix][1] = len(paths)
+
+    def __len__(self):
+        return len(self._paths)
+
+    def _positions(self, prefixes):
+        """ the sorted positions of leaves below any of the prefixes """
+        spans = sorted([self._ranges[prefix] for prefix in prefixes])
+        positions = []
+        end = 0
+        for start, stop in spans:
+            start = max(start, end)
+            if stop > start:
+                positions.extend(range(start, stop))
+                end = stop
+        return positions
+
+    def _key_prefixes(self, key):
+        try:
+            return self._keys.get(key, [])
+        except TypeError:
+            return []
+
+    def _items(self, positions):
+        return ((self._paths[pos], self._values[pos]) for pos in positions)
+
+    def _with_keys(self, keys, use_wildcards=False):
+        """ leaves with any of the keys in their path """
+        prefixes = []
+        if use_wildcards:
+            match = _key_matcher(keys)
+            for ikey, iprefixes in self._keys.items():
+                if match(ikey):
+                    prefixes.extend(iprefixes)
+        else:
+            for key in keys:
+                prefixes.extend(self._key_prefixes(key))
+        return self._items(self._positions(prefixes))
+
+    def _with_paths(self, paths):
+        """ leaves whose path contains all keys of any of the paths """
+        found = set()
+        for path in paths:
+            path = set(path)
+            if not path:
+                return self._items(range(len(self._paths)))
+            # only check leaves below the least common key
+            prefixes = min([self._key_prefixes(key) for key in path], key=len)
+            found.update([pos for pos in self._positions(prefixes)
+                          if path.issubset(self._paths[pos])])
+        return self._items(sorted(found))
+
+    def _with_values(self, vals):
+        """ leaves with a value in vals """
+        found = set()
+        for val in vals:
+            try:
+                found.update(self._leafvalues.get(val, []))
+            except TypeError:
+                # unhashable, so check all leaves
+                for pos, value in enumerate(self._values):
+                    try:
+                        if value == val:
+                            found.add(pos)
+                    except Exception:
+                        pass
+        for pos in self._unhashable:
+            try:
+                if self._values[pos] in vals:
+                    found.add(pos)
+            except Exception:
+                pass
+        return self._items(sorted(found))
+
+    def _with_keytests(self, keytests, logic, keep_siblings):
+        """ leaves selected by filter_keyvals/filter_keyfuncs,
+        where keytests maps leaf key -> func(value) -> True/False
+        """
+        matched = []
+        for key, test in keytests.items():
+            try:
+                positions = self._leafkeys.get(key, [])
+            except TypeError:
+                continue
+            matched.extend([pos for pos in positions
+                            if test(self._values[pos])])
+        matched.sort()
+
+        if logic == "OR":
+            if not keep_siblings:
+                return self._items(matched)
+            parents = set([self._paths[pos][:-1] for pos in matched])
+            return self._items(self._positions(parents))
+
+        groups = {}
+        for pos in matched:
+            path = self._paths[pos]
+            groups.setdefault(path[:-1], set()).add(path[-1])
+        all_keys = set(keytests.keys())
+        parents = [k for k, v in groups.items() if v == all_keys]
+        positions = self._positions(parents)
+        if not keep_siblings:
+            positions = [pos for pos in positions
+                         if self._paths[pos][-1] in all_keys]
+        return self._items(positions)
+
+
 def remove_keys(d, keys=None, use_wildcards=True,
                 list_of_dicts=False, deepcopy=True):
     """remove certain keys from nested dict, retaining preceeding paths
@@ -901,31 +1643,14 @@ def remove_keys(d, keys=None, use_wildcards=True,
     """
     keys = [] if keys is None else keys
     list_of_dicts = '__list__' if list_of_dicts else None
-
-    def is_in(a, bs):
-        if use_wildcards:
-            for b in bs:
-                try:
-                    if a == b:
-                        return True
-                    if fnmatch(a, b):
-                        return True
-                except Exception:
-                    pass
-            return False
-        else:
-            try:
-                return a in bs
-            except Exception:
-                return False
+    match = _key_matcher(keys, use_wildcards)
 
     if not hasattr(d, 'items'):
         return d
-    else:
-        dic = flatten(d, list_of_dicts=list_of_dicts)
-        new_dic = {}
-        for key, value in dic.items():
-            new_key = tuple([i for i in key if not is_in(i, keys)])
+
+    def new_items():
+        for key, value in iflatten(d, list_of_dicts=list_of_dicts):
+            new_key = tuple([i for i in key if not match(i)])
             if not new_key:
                 continue
             try:
@@ -933,9 +1658,10 @@ def remove_keys(d, keys=None, use_wildcards=True,
                     continue
             except Exception:
                 pass
-            new_dic[new_key] = value
-        return unflatten(
-            new_dic, list_of_dicts=list_of_dicts, deepcopy=deepcopy)
+            yield new_key, value
+
+    return iunflatten(new_items(), list_of_dicts=list_of_dicts,
+                      deepcopy=deepcopy, overwrite=True)
 
 
 def remove_keyvals(d, keyvals=None, list_of_dicts=False, deepcopy=True):
@@ -975,21 +1701,22 @@ def remove_keyvals(d, keyvals=None, list_of_dicts=False, deepcopy=True):
     if not hasattr(d, 'items'):
         return d
 
-    flatd = flatten(d, list_of_dicts=list_of_dicts)
-
     def is_in(a, b):
         try:
             return a in b
         except Exception:
             return False
 
-    prune = [k[0] for k, v in flatd.items() if is_in((k[-1], v), keyvals)]
-    flatd = {k: v for k, v in flatd.items() if not is_in(k[0], prune)}
+    prune = [k[0] for k, v in iflatten(d, list_of_dicts=list_of_dicts)
+             if is_in((k[-1], v), keyvals)]
+    items = ((k, v) for k, v in iflatten(d, list_of_dicts=list_of_dicts)
+             if not is_in(k[0], prune))
 
-    return unflatten(flatd, list_of_dicts=list_of_dicts, deepcopy=deepcopy)
+    return iunflatten(items, list_of_dicts=list_of_dicts, deepcopy=deepcopy)
 
 
-def remove_paths(d, keys, list_of_dicts=False, deepcopy=True):
+def remove_paths(d, keys, list_of_dicts=False, deepcopy=True,
+                 in_place=False):
     """ remove paths containing certain keys from dict
 
     Parameters
@@ -1001,6 +1728,11 @@ def remove_paths(d, keys, list_of_dicts=False, deepcopy=True):
         treat list of dicts as additional branches
     deepcopy: bool
         deepcopy values
+    in_place: bool
+        delete the paths from d itself, and return it (deepcopy is ignored).
+        A dict found at several paths in d is only edited at the first
+        of them, and the change shows at each of those paths.
+        Unlike the copy, dicts (and list items) left empty are retained
 
     Examples
     --------
@@ -1022,6 +1754,12 @@ def remove_paths(d, keys, list_of_dicts=False, deepcopy=True):
     >>> pprint(remove_paths(d2,["b"],list_of_dicts=True))
     {'a': [{'c': 2}]}
 
+    >>> new = remove_paths(d2,["b"],list_of_dicts=True,in_place=True)
+    >>> new is d2
+    True
+    >>> pprint(d2)
+    {'a': [{'c': {}}, {'c': 2}]}
+
     """
     keys = [(key,) if not isinstance(key, tuple) else key for key in keys]
     list_of_dicts = '__list__' if list_of_dicts else None
@@ -1032,11 +1770,23 @@ def remove_paths(d, keys, list_of_dicts=False, deepcopy=True):
                 return True
         return False
 
-    flatd = flatten(d, list_of_dicts=list_of_dicts)
+    if in_place:
+        def edit(node, path):
+            descend = []
+            for key in list(node.keys()):
+                subpath = path + (key,)
+                if contains(subpath):
+                    del node[key]
+                else:
+                    descend.append((node[key], subpath))
+            return descend
+
+        return _edit_in_place(d, edit, list_of_dicts)
 
-    flatd = {path: v for path, v in flatd.items() if not contains(path)}
+    items = ((path, v) for path, v in iflatten(d, list_of_dicts=list_of_dicts)
+             if not contains(path))
 
-    return unflatten(flatd, list_of_dicts=list_of_dicts, deepcopy=deepcopy)
+    return iunflatten(items, list_of_dicts=list_of_dicts, deepcopy=deepcopy)
     # return {key: remove_paths(value,keys)
     # for key, value in d.items() if key not in keys}
 
@@ -1046,7 +1796,8 @@ def filter_values(d, vals=None, list_of_dicts=False, deepcopy=True):
 
     Parameters
     ----------
-    d : dict
+    d : dict or PathIndex
+        if a PathIndex, list_of_dicts is taken from the index
     vals : list
         values to filter by
     list_of_dicts: bool
@@ -1063,35 +1814,97 @@ def filter_values(d, vals=None, list_of_dicts=False, deepcopy=True):
 
     """
     vals = [] if vals is None else vals
+    if isinstance(d, PathIndex):
+        return iunflatten(d._with_values(vals), list_of_dicts=d.list_of_dicts,
+                          deepcopy=deepcopy)
     list_of_dicts = '__list__' if list_of_dicts else None
 
-    flatd = flatten(d, list_of_dicts=list_of_dicts)
-
     def is_in(a, b):
         try:
             return a in b
         except Exception:
             return False
 
-    flatd = {k: v for k, v in flatd.items() if is_in(v, vals)}
-    return unflatten(flatd, list_of_dicts=list_of_dicts, deepcopy=deepcopy)
+    items = ((k, v) for k, v in iflatten(d, list_of_dicts=list_of_dicts)
+             if is_in(v, vals))
+    return iunflatten(items, list_of_dicts=list_of_dicts, deepcopy=deepcopy)
 
 
-def _in_pruned(k, pruned):
-    for p in pruned:
-        if tuple(k[:len(p)]) == p:
+class _PrefixTrie(object):
+    """ a set of path prefixes, with O(depth) tests for
+    whether a path starts with any of them
+    """
+    _END = object()
+
+    def __init__(self, prefixes=()):
+        self._root = {}
+        for prefix in prefixes:
+            self.add(prefix)
+
+    def add(self, prefix):
+        node = self._root
+        for key in prefix:
+            node = node.setdefault(key, {})
+        node[self._END] = True
+
+    def has_prefix(self, path):
+        node = self._root
+        if self._END in node:
             return True
-    return False
+        for key in path:
+            node = node.get(key, None)
+            if node is None:
+                return False
+            if self._END in node:
+                return True
+        return False
+
+
+def _iter_keytests(d, keytests, logic, keep_siblings, list_of_dicts):
+    """ yield the (path, value) leaves selected by filter_keyvals or
+    filter_keyfuncs, where keytests maps leaf key -> func(value) -> True/False
+    """
+    def matches(path, value):
+        test = keytests.get(path[-1], None)
+        return test is not None and test(value)
+
+    if logic == "OR" and not keep_siblings:
+        for path, value in iflatten(d, list_of_dicts=list_of_dicts):
+            if matches(path, value):
+                yield path, value
+        return
+
+    # first pass; find the parent paths of the selected leaves
+    if logic == "OR":
+        parents = set([path[:-1] for path, value in
+                       iflatten(d, list_of_dicts=list_of_dicts)
+                       if matches(path, value)])
+    else:
+        groups = {}
+        for path, value in iflatten(d, list_of_dicts=list_of_dicts):
+            if matches(path, value):
+                groups.setdefault(path[:-1], set()).add(path[-1])
+        all_keys = set(keytests.keys())
+        parents = [k for k, v in groups.items() if v == all_keys]
+    pruned = _PrefixTrie(parents)
+
+    # second pass; yield the leaves below them
+    for path, value in iflatten(d, list_of_dicts=list_of_dicts):
+        if logic == "AND" and not keep_siblings and path[-1] not in all_keys:
+            continue
+        if pruned.has_prefix(path):
+            yield path, value
 
 
-# TODO filter_keyvals; deal with uncomparable values, speedup?
+# TODO filter_keyvals; deal with uncomparable values
 def filter_keyvals(d, keyvals, logic="OR", keep_siblings=False,
                    list_of_dicts=False, deepcopy=True):
     """ filters leaf nodes key:value pairs of nested dictionary
 
     Parameters
     ----------
-    d : dict
+    d : dict or PathIndex
+        if a PathIndex, list_of_dicts is taken from the index
     keyvals : dict or list[tuple]
         (key,value) pairs to filter by
     logic : str
@@ -1142,39 +1955,20 @@ def filter_keyvals(d, keyvals, logic="OR", keep_siblings=False,
         raise ValueError("repeating keys in keyvals: {}".format(keyvals))
 
     keyvals = dict(keyvals)
-    list_of_dicts = '__list__' if list_of_dicts else None
-
-    flattened = flatten(d, list_of_dicts=list_of_dicts)
+    if logic not in ("OR", "AND"):
+        raise ValueError("logic must be AND or OR: {}".format(logic))
+    keytests = dict([(key, lambda v, val=val: v == val)
+                     for key, val in keyvals.items()])
 
-    if logic == "OR":
-        if keep_siblings:
-            pruned = {
-                tuple(k[:-1]) for k, v in flattened.items()
-                if any(key == k[-1] and v == keyvals[key] for key in keyvals)}
-            filtered = {k: v for k, v in flattened.items()
-                        if _in_pruned(k, pruned)}
-        else:
-            filtered = {
-                k: v for k, v in flattened.items()
-                if any(key == k[-1] and v == keyvals[key] for key in keyvals)}
-    elif logic == "AND":
-        pruned = {}
-        for k, v in flattened.items():
-            if any(key == k[-1] and v == keyvals[key] for key in keyvals):
-                pruned[tuple(k[:-1])] = pruned.get(tuple(k[:-1]), []) + [k[-1]]
-        all_keys = set(keyvals.keys())
-        pruned = [k for k, v in pruned.items() if set(v) == all_keys]
-
-        if keep_siblings:
-            filtered = {k: v for k, v in flattened.items()
-                        if _in_pruned(k, pruned)}
-        else:
-            filtered = {k: v for k, v in flattened.items(
-            ) if k[-1] in all_keys and _in_pruned(k, pruned)}
+    if isinstance(d, PathIndex):
+        items = d._with_keytests(keytests, logic, keep_siblings)
+        list_of_dicts = d.list_of_dicts
     else:
-        raise ValueError("logic must be AND or OR: {}".format(logic))
+        list_of_dicts = '__list__' if list_of_dicts else None
+        items = _iter_keytests(d, keytests, logic, keep_siblings,
+                               list_of_dicts)
 
-    return unflatten(filtered, list_of_dicts=list_of_dicts, deepcopy=deepcopy)
+    return iunflatten(items, list_of_dicts=list_of_dicts, deepcopy=deepcopy)
 
 
 def filter_keyfuncs(d, keyfuncs, logic="OR", keep_siblings=False,
@@ -1184,7 +1978,8 @@ def filter_keyfuncs(d, keyfuncs, logic="OR", keep_siblings=False,
 
     Parameters
     ----------
-    d : dict
+    d : dict or PathIndex
+        if a PathIndex, list_of_dicts is taken from the index
     keyfuncs : dict or list[tuple]
         (key,funcs) pairs to filter by
     logic : str
@@ -1226,39 +2021,18 @@ def filter_keyfuncs(d, keyfuncs, logic="OR", keep_siblings=False,
     if len(keyfuncs) != len(dict(keyfuncs)):
         raise ValueError("repeating keys in keyfuncs: {}".format(keyfuncs))
     keyfuncs = dict(keyfuncs)
-    list_of_dicts = '__list__' if list_of_dicts else None
-
-    flattened = flatten(d, list_of_dicts=list_of_dicts)
+    if logic not in ("OR", "AND"):
+        raise ValueError("logic must be AND or OR: {}".format(logic))
 
-    if logic == "OR":
-        if keep_siblings:
-            pruned = {
-                tuple(k[:-1]) for k, v in flattened.items()
-                if any(key == k[-1] and keyfuncs[key](v) for key in keyfuncs)}
-            filtered = {k: v for k, v in flattened.items()
-                        if _in_pruned(k, pruned)}
-        else:
-            filtered = {
-                k: v for k, v in flattened.items()
-                if any(key == k[-1] and keyfuncs[key](v) for key in keyfuncs)}
-    elif logic == "AND":
-        pruned = {}
-        for k, v in flattened.items():
-            if any(key == k[-1] and keyfuncs[key](v) for key in keyfuncs):
-                pruned[tuple(k[:-1])] = pruned.get(tuple(k[:-1]), []) + [k[-1]]
-        all_keys = set(keyfuncs.keys())
-        pruned = [k for k, v in pruned.items() if set(v) == all_keys]
-
-        if keep_siblings:
-            filtered = {k: v for k, v in flattened.items()
-                        if _in_pruned(k, pruned)}
-        else:
-            filtered = {k: v for k, v in flattened.items(
-            ) if k[-1] in all_keys and _in_pruned(k, pruned)}
+    if isinstance(d, PathIndex):
+        items = d._with_keytests(keyfuncs, logic, keep_siblings)
+        list_of_dicts = d.list_of_dicts
     else:
-        raise ValueError("logic must be AND or OR: {}".format(logic))
+        list_of_dicts = '__list__' if list_of_dicts else None
+        items = _iter_keytests(d, keyfuncs, logic, keep_siblings,
+                               list_of_dicts)
 
-    return unflatten(filtered, list_of_dicts=list_of_dicts, deepcopy=deepcopy)
+    return iunflatten(items, list_of_dicts=list_of_dicts, deepcopy=deepcopy)
 
 
 def filter_keys(d, keys, use_wildcards=False,
@@ -1267,7 +2041,8 @@ def filter_keys(d, keys, use_wildcards=False,
 
     Parameters
     ----------
-    d : dict
+    d : dict or PathIndex
+        if a PathIndex, list_of_dicts is taken from the index
     keys: list
     use_wildcards : bool
         if true, can use * (matches everything)
@@ -1291,29 +2066,16 @@ def filter_keys(d, keys, use_wildcards=False,
     {1: {'axxxx': 'A'}}
 
     """
+    if isinstance(d, PathIndex):
+        return iunflatten(d._with_keys(keys, use_wildcards),
+                          list_of_dicts=d.list_of_dicts, deepcopy=deepcopy)
     list_of_dicts = '__list__' if list_of_dicts else None
-    flatd = flatten(d, list_of_dicts=list_of_dicts)
-
-    def is_in(a, bs):
-        if use_wildcards:
-            for b in bs:
-                try:
-                    if a == b:
-                        return True
-                    if fnmatch(b, a):
-                        return True
-                except Exception:
-                    pass
-            return False
-        else:
-            try:
-                return a in bs
-            except Exception:
-                return False
+    match = _key_matcher(keys, use_wildcards)
 
-    flatd = {paths: v for paths, v in flatd.items() if any(
-        [is_in(k, paths) for k in keys])}
-    return unflatten(flatd, list_of_dicts=list_of_dicts, deepcopy=deepcopy)
+    items = ((paths, v)
+             for paths, v in iflatten(d, list_of_dicts=list_of_dicts)
+             if any([match(k) for k in paths]))
+    return iunflatten(items, list_of_dicts=list_of_dicts, deepcopy=deepcopy)
 
 
 def filter_paths(d, paths, list_of_dicts=False, deepcopy=True):
@@ -1321,7 +2083,8 @@ def filter_paths(d, paths, list_of_dicts=False, deepcopy=True):
 
     Parameters
     ----------
-    d : dict
+    d : dict or PathIndex
+        if a PathIndex, list_of_dicts is taken from the index
     paths : list[str] or list[tuple]
     list_of_dicts: bool
         treat list of dicts as additional branches
@@ -1344,22 +2107,19 @@ def filter_paths(d, paths, list_of_dicts=False, deepcopy=True):
     {'a': [{'c': 3}, {'c': 2}]}
 
     """
+    paths = [path if isinstance(path, tuple) else [path] for path in paths]
+    if isinstance(d, PathIndex):
+        return iunflatten(d._with_paths(paths), list_of_dicts=d.list_of_dicts,
+                          deepcopy=deepcopy)
     list_of_dicts = '__list__' if list_of_dicts else None
 
-    all_keys = [x for y in paths if isinstance(y, tuple) for x in y]
-    all_keys += [x for x in paths if not isinstance(x, tuple)]
-    # faster to filter first I think
-    new_d = filter_keys(d, all_keys, list_of_dicts=list_of_dicts)
-    new_d = flatten(d, list_of_dicts=list_of_dicts)
-    for key in list(new_d.keys()):
-        if not any([
-                set(key).issuperset(path if isinstance(path, tuple) else[path])
-                for path in paths]):
-            new_d.pop(key)
-    return unflatten(new_d, list_of_dicts=list_of_dicts, deepcopy=deepcopy)
+    items = ((key, v) for key, v in iflatten(d, list_of_dicts=list_of_dicts)
+             if any([set(key).issuperset(path) for path in paths]))
+    return iunflatten(items, list_of_dicts=list_of_dicts, deepcopy=deepcopy)
 
 
-def rename_keys(d, keymap=None, list_of_dicts=False, deepcopy=True):
+def rename_keys(d, keymap=None, list_of_dicts=False, deepcopy=True,
+                in_place=False):
     """ rename keys in dict
 
     Parameters
@@ -1371,6 +2131,18 @@ def rename_keys(d, keymap=None, list_of_dicts=False, deepcopy=True):
         treat list of dicts as additional branches
     deepcopy: bool
         deepcopy values
+    in_place: bool
+        rename the keys of the dicts in d (which is returned),
+        rather than building a new dict (deepcopy is ignored).
+        Dicts shared with other objects are renamed for them too,
+        a dict found at several paths in d is only renamed once
+        (the change showing at each of those paths), and clashing
+        renamed branches are merged into the existing one
+        (raising a KeyError for a leaf/branch clash, as for a copy,
+        by which point d may be partially renamed).
+        Unlike the copy, empty dicts (and the list items holding them)
+        are retained, so they can also clash with a renamed leaf
+        (raising a KeyError), and list indexes are unchanged
 
     Examples
     --------
@@ -1380,23 +2152,73 @@ def rename_keys(d, keymap=None, list_of_dicts=False, deepcopy=True):
     >>> pprint(rename_keys(d,{'old_name':'new_name'}))
     {'a': {'new_name': 1}}
 
+    >>> sub = d['a']
+    >>> new = rename_keys(d,{'old_name':'new_name'},in_place=True)
+    >>> new is d, sub
+    (True, {'new_name': 1})
+
+    >>> shared = {'a': 1, 'b': 2}
+    >>> d = {'x': shared, 'y': shared}
+    >>> pprint(rename_keys(d,{'a': 'b', 'b': 'a'},in_place=True))
+    {'x': {'a': 2, 'b': 1}, 'y': {'a': 2, 'b': 1}}
+
+    >>> rename_keys({'a': {'x': 1}, 'b': 2}, {'b': 'a'}, in_place=True)
+    Traceback (most recent call last):
+    ...
+    KeyError: "child conflict for path: ('a',); 2 and {'x': 1}"
+
+    >>> rename_keys({'d': {'c': {}}, 'b': 'x'}, {'b': 'd'})
+    {'d': 'x'}
+    >>> rename_keys({'d': {'c': {}}, 'b': 'x'}, {'b': 'd'}, in_place=True)
+    Traceback (most recent call last):
+    ...
+    KeyError: "child conflict for path: ('d',); x and {'c': {}}"
+
     """
     list_of_dicts = '__list__' if list_of_dicts else None
     keymap = {} if keymap is None else keymap
 
-    flatd = flatten(d, list_of_dicts=list_of_dicts)
-
-    flatd = {
-        tuple([keymap.get(k, k) for k in path]): v for path, v in flatd.items()
-    }
-
-    return unflatten(flatd, list_of_dicts=list_of_dicts, deepcopy=deepcopy)
+    if in_place:
+        def insert(node, path, key, val):
+            """ insert val, merging branches and with later leaves
+            replacing earlier ones, as for iunflatten(overwrite=True) """
+            if key in node:
+                current = node[key]
+                if is_dict_like(current) and is_dict_like(val):
+                    for subkey, subval in list(val.items()):
+                        insert(current, path + (key,), subkey, subval)
+                    return
+                if is_dict_like(current) or is_dict_like(val):
+                    v1, v2 = sorted([str(val), str(current)])
+                    raise KeyError("child conflict for path: "
+                                   "{0}; {1} and {2}".format(
+                                       path + (key,), v1, v2))
+            node[key] = val
+
+        def edit(node, path):
+            items = list(node.items())
+            if not any([k in keymap for k, _ in items]):
+                return
+            # the parents are renamed after their children
+            path = tuple([keymap.get(k, k) for k in path])
+            # re-insert all keys, to keep their order
+            node.clear()
+            for k, v in items:
+                insert(node, path, keymap.get(k, k), v)
+
+        return _edit_in_place(d, edit, list_of_dicts, children_first=True)
+
+    items = ((tuple([keymap.get(k, k) for k in path]), v)
+             for path, v in iflatten(d, list_of_dicts=list_of_dicts))
+
+    return iunflatten(items, list_of_dicts=list_of_dicts, deepcopy=deepcopy,
+                      overwrite=True)
     # return {keymap[key] if key in keymap else key: rename_keys(value,keymap)
     # for key, value in d.items()}
 
 
 def split_key(d, key, new_keys, before=True,
-              list_of_dicts=False, deepcopy=True):
+              list_of_dicts=False, deepcopy=True, in_place=False):
     """ split an existing key(s) into multiple levels
 
     Parameters
@@ -1411,6 +2233,17 @@ def split_key(d, key, new_keys, before=True,
         add level before existing key (else after)
     list_of_dicts: bool
         treat list of dicts as additional branches
+    deepcopy: bool
+        deepcopy values
+    in_place: bool
+        move the values within d (which is returned), rather than
+        building a new dict (deepcopy is ignored); split keys are moved
+        to the end of their dict.
+        A dict found at several paths in d is only split once,
+        and the change shows at each of those paths.
+        Unlike the copy, empty dicts (and the list items holding them)
+        are retained (and split), so the result can have additional
+        empty branches, and list indexes are unchanged
 
     Examples
     --------
@@ -1426,31 +2259,63 @@ def split_key(d, key, new_keys, before=True,
     >>> pprint(split_key(d2,'a',['b'],list_of_dicts=True))
     [{'b': {'a': 1}}, {'b': {'a': 2}}, {'b': {'a': 3}}]
 
+    >>> d3 = {'a':1,'c':{'a':2}}
+    >>> pprint(split_key(d3,'a',['c'],in_place=True))
+    {'c': {'a': 1, 'c': {'a': 2}}}
+    >>> pprint(d3)
+    {'c': {'a': 1, 'c': {'a': 2}}}
+
+    >>> shared = {'a': 1}
+    >>> pprint(split_key({'x': shared, 'y': shared},'a',['b'],in_place=True))
+    {'x': {'b': {'a': 1}}, 'y': {'b': {'a': 1}}}
+
     """
     list_of_dicts = '__list__' if list_of_dicts else None
-    flatd = flatten(d, list_of_dicts=list_of_dicts)
-
-    newd = {}
-    for path, v in flatd.items():
-        if key in path:
-            newk = []
-            for k in path:
-                if k == key:
-                    if before:
-                        newk = newk + new_keys + [k]
+
+    if in_place:
+        parts = list(new_keys) + [key] if before else [key] + list(new_keys)
+
+        def edit(node, path):
+            if key not in node:
+                return
+            value = node.pop(key)
+            branch = node
+            for i, part in enumerate(parts[:-1]):
+                if part not in branch:
+                    branch[part] = {}
+                elif not is_dict_like(branch[part]):
+                    node[key] = value
+                    raise KeyError("child conflict for path: {0}; {1}".format(
+                        path + tuple(parts[:i + 1]), branch[part]))
+                branch = branch[part]
+            branch[parts[-1]] = value
+
+        # children first, so that moved values are not split again
+        return _edit_in_place(d, edit, list_of_dicts, children_first=True)
+
+    def new_items():
+        for path, v in iflatten(d, list_of_dicts=list_of_dicts):
+            if key in path:
+                newk = []
+                for k in path:
+                    if k == key:
+                        if before:
+                            newk = newk + new_keys + [k]
+                        else:
+                            newk = newk + [k] + new_keys
                     else:
-                        newk = newk + [k] + new_keys
-                else:
-                    newk.append(k)
-            newd[tuple(newk)] = v
-        else:
-            newd[path] = v
+                        newk.append(k)
+                yield tuple(newk), v
+            else:
+                yield path, v
 
-    return unflatten(newd, list_of_dicts=list_of_dicts, deepcopy=deepcopy)
+    return iunflatten(new_items(), list_of_dicts=list_of_dicts,
+                      deepcopy=deepcopy, overwrite=True)
 
 
 def apply(d, leaf_key, func, new_name=None, remove_lkey=True,
-          list_of_dicts=False, unflatten_level=0, deepcopy=True, **kwargs):
+          list_of_dicts=False, unflatten_level=0, deepcopy=True,
+          in_place=False, **kwargs):
     """ apply a function to all values with a certain leaf (terminal) key
 
     Parameters
@@ -1471,6 +2336,16 @@ def apply(d, leaf_key, func, new_name=None, remove_lkey=True,
         for instance if you need dicts as inputs
     deepcopy: bool
         deepcopy values
+    in_place: bool
+        set the new values in the dicts of d (which is returned),
+        rather than building a new dict (deepcopy is ignored),
+        only available for unflatten_level=0.
+        A dict found at several paths in d is only edited once,
+        and the change shows at each of those paths.
+        Renaming a leaf onto an existing branch raises a KeyError,
+        as for a copy.
+        Unlike the copy, empty dicts (and the list items holding them)
+        are retained, so list indexes are unchanged
     kwargs : dict
         additional keywords to parse to function
 
@@ -1491,7 +2366,52 @@ def apply(d, leaf_key, func, new_name=None, remove_lkey=True,
     >>> pprint(apply(test_dict, "b", lambda x: x[-1], list_of_dicts=True, unflatten_level=2))
     {'a': [{'b': {'e': 3, 'f': 4}}, {'b': {'e': 7, 'f': 8}}]}
 
+    >>> d = {'x':{'a':1},'y':[{'a':2}]}
+    >>> pprint(apply(d,'a',func,list_of_dicts=True,in_place=True))
+    {'x': {'a': 2}, 'y': [{'a': 3}]}
+    >>> pprint(d)
+    {'x': {'a': 2}, 'y': [{'a': 3}]}
+
+    >>> shared = {'a': 1}
+    >>> d = {'x': shared, 'y': shared}
+    >>> pprint(apply(d,'a',func,in_place=True))
+    {'x': {'a': 2}, 'y': {'a': 2}}
+    >>> d['x'] is d['y']
+    True
+
+    >>> apply({'a':{'b':1},'b':'x'},'b',str,new_name='a',in_place=True)
+    Traceback (most recent call last):
+    ...
+    KeyError: "child conflict for path: ('a',); x and {'b': 1}"
+
     """  # noqa: E501
+    if in_place:
+        if unflatten_level != 0:
+            raise ValueError(
+                'in_place is only available for unflatten_level=0')
+
+        def edit(node, path):
+            if leaf_key not in node:
+                return
+            value = node[leaf_key]
+            if is_dict_like(value) or (
+                    list_of_dicts and is_list_of_dict_like(value)):
+                return  # a branch, not a leaf
+            new_value = func(value, **kwargs)
+            if new_name is not None and new_name in node:
+                current = node[new_name]
+                if is_dict_like(current) or (
+                        list_of_dicts and is_list_of_dict_like(current)):
+                    v1, v2 = sorted([str(new_value), str(current)])
+                    raise KeyError("child conflict for path: "
+                                   "{0}; {1} and {2}".format(
+                                       path + (new_name,), v1, v2))
+            if new_name is not None and remove_lkey:
+                del node[leaf_key]
+            node[leaf_key if new_name is None else new_name] = new_value
+
+        return _edit_in_place(d, edit, list_of_dicts)
+
     list_of_dicts = '__list__' if list_of_dicts else None
     if unflatten_level == 0:
         flatd = flatten(d, list_of_dicts=list_of_dicts)
@@ -1670,7 +2590,7 @@ def split_lists(d, split_keys, new_name='split',
     return unflatten(new_d, deepcopy=deepcopy)
 
 
-def combine_lists(d, keys=None, deepcopy=True):
+def combine_lists(d, keys=None, deepcopy=True, in_place=False):
     """combine lists of dicts
 
     Parameters
@@ -1680,6 +2600,11 @@ def combine_lists(d, keys=None, deepcopy=True):
         keys to combine (all if None)
     deepcopy: bool
         deepcopy values
+    in_place: bool
+        replace the lists in d (which is returned), rather than
+        building a new dict (deepcopy is ignored).
+        A dict found at several paths in d is only edited once.
+        If d is a list, it is left unchanged and the combined dict returned
 
     Example
     -------
@@ -1691,6 +2616,10 @@ def combine_lists(d, keys=None, deepcopy=True):
     >>> combine_lists([{"a":2}, {"a":1}])
     {'a': [2, 1]}
 
+    >>> combine_lists(d,['split'],in_place=True) is d
+    True
+    >>> pprint(d)
+    {'path_key': {'a': 1, 'split': {'x': [1, 2], 'y': [3, 4]}}}
 
     """  # noqa: E501
     if isinstance(d, list):
@@ -1699,27 +2628,39 @@ def combine_lists(d, keys=None, deepcopy=True):
     else:
         init_list = False
 
-    flattened = flatten(d, list_of_dicts=None)
-    for key, value in list(flattened.items()):
+    def combinable(key, value):
         if keys is not None:
             try:
-                if not key[-1] in keys:
-                    continue
+                if key not in keys:
+                    return False
             except Exception:
-                continue
+                return False
         if not isinstance(value, list):
-            continue
-        if not all([is_dict_like(d) for d in value]):
-            continue
+            return False
+        return all([is_dict_like(d) for d in value])
+
+    def combine(value):
         newd = {}
         for subdic in value:
             for subk, subv in subdic.items():
                 if subk not in newd:
                     newd[subk] = []
                 newd[subk].append(subv)
-        flattened[key] = newd
+        return newd
 
-    final = unflatten(flattened, list_of_dicts=None, deepcopy=deepcopy)
+    if in_place:
+        def edit(node, path):
+            for key, value in list(node.items()):
+                if combinable(key, value):
+                    node[key] = combine(value)
+
+        final = _edit_in_place(d, edit)
+    else:
+        flattened = flatten(d, list_of_dicts=None)
+        for key, value in list(flattened.items()):
+            if combinable(key[-1], value):
+                flattened[key] = combine(value)
+        final = unflatten(flattened, list_of_dicts=None, deepcopy=deepcopy)
 
     if init_list:
         return list(final.values())[0]
@@ -1769,10 +2710,349 @@ def list_to_dict(lst, key=None, remove_key=True):
     return new_dict
 
 
+# leaf types whose values are equal only if their type and repr are
+_DIGEST_TYPES = set([bool, int, float, type(None), str, bytes, unicode])
+
+
+def _diff_branch(value, iter_prefix):
+    """ get a list of (key, value) for a branch, or None if a leaf """
+    if is_dict_like(value):
+        return list(value.items())
+    elif iter_prefix is not None and is_iter_non_string(value):
+        return [('{0}{1}'.format(iter_prefix, i), v)
+                for i, v in enumerate(value)]
+    return None
+
+
+def _subtree_digest(obj, iter_prefix, cache):
+    """ get a (Merkle) sha1 hex digest of a branch, from those of its
+    sub-branches and the type and repr of its keys and leaves,
+    or None if it contains leaves that may not equal themselves,
+    i.e. not of _DIGEST_TYPES, or nan
+
+    the digests of all sub-branches are stored in cache,
+    as {(id(branch), iter_prefix is None): (branch, digest)}.
+    The order of dict keys is included, which is cheaper than sorting them,
+    and they are usually the same for equal dicts
+
+    """
+    lists_are_leaves = iter_prefix is None
+
+    def is_branch(value):
+        return (isinstance(value, dict) or is_dict_like(value) or
+                (not lists_are_leaves and is_iter_non_string(value)))
+
+    stack = [(obj, None, None)]
+    while stack:
+        node, items, is_dict = stack.pop()
+        key = (id(node), lists_are_leaves)
+        if items is None:
+            cached = cache.get(key)
+            if cached is not None and cached[0] is node:
+                continue
+            is_dict = isinstance(node, dict) or is_dict_like(node)
+            items = list(node.items()) if is_dict else [(None, v)
+                                                        for v in node]
+            stack.append((node, items, is_dict))
+            stack.extend([(v, None, None) for _, v in items
+                          if type(v) not in _DIGEST_TYPES and is_branch(v)])
+            continue
+
+        parts = ['dict' if is_dict else 'iter']
+        for k, v in items:
+            if is_dict:
+                if type(k) not in _DIGEST_TYPES or k != k:
+                    parts = None
+                    break
+                parts.append(type(k).__name__)
+                parts.append(k)
+            vtype = type(v)
+            if vtype in _DIGEST_TYPES:
+                if v != v:  # i.e. nan
+                    parts = None
+                    break
+                parts.append(vtype.__name__)
+                parts.append(v)
+            else:
+                cached = cache.get((id(v), lists_are_leaves))
+                if cached is None or cached[0] is not v or cached[1] is None:
+                    parts = None
+                    break
+                parts.append('#')
+                parts.append(cached[1])
+        digest = None
+        if parts is not None:
+            digest = hashlib.sha1(repr(parts).encode(
+                'utf8', 'backslashreplace')).hexdigest()
+        cache[key] = (node, digest)
+    return cache[(id(obj), lists_are_leaves)][1]
+
+
+def _not_allclose(pairs, numpy, **kwargs):
+    """ filter a list of (path, val, other_val) to those where
+    numpy.allclose(val, other_val, **kwargs) is not true
+
+    numeric scalars, and numeric arrays of the same shape,
+    are stacked and compared with a single call to numpy.isclose,
+    other pairs (or groups that raise an error) are compared separately
+
+    """
+    def is_number(val):
+        vtype = type(val)
+        if vtype is float:
+            return True
+        if vtype is int:
+            return -2**63 <= val < 2**63
+        return isinstance(val, (numpy.floating, numpy.integer))
+
+    def is_array(val):
+        return isinstance(val, numpy.ndarray) and val.dtype.kind in 'iuf'
+
+    scalars = []
+    arrays = {}
+    others = []
+    for pair in pairs:
+        _, val, other_val = pair
+        if is_number(val) and is_number(other_val):
+            scalars.append(pair)
+        elif (is_array(val) and is_array(other_val)
+              and val.shape == other_val.shape):
+            arrays.setdefault(val.shape, []).append(pair)
+        else:
+            others.append(pair)
+
+    remaining = []
+    for group in [scalars] + list(arrays.values()):
+        if not group:
+            continue
+        try:
+            close = numpy.isclose(numpy.array([p[1] for p in group]),
+                                  numpy.array([p[2] for p in group]),
+                                  **kwargs)
+            if close.ndim > 1:
+                close = close.all(axis=tuple(range(1, close.ndim)))
+        except Exception:
+            others.extend(group)
+            continue
+        remaining.extend([p for p, c in zip(group, close) if not c])
+
+    for pair in others:
+        try:
+            if numpy.allclose(pair[1], pair[2], **kwargs):
+                continue
+        except Exception:
+            pass
+        remaining.append(pair)
+
+    return remaining
+
+
+def _to_pointer(path):
+    """ convert a list of keys to a json pointer (RFC 6901) """
+    return ''.join(['/' + str(key).replace('~', '~0').replace('/', '~1')
+                    for key in path])
+
+
+def _from_pointer(pointer):
+    """ convert a json pointer (RFC 6901) to a list of str keys """
+    if not pointer:
+        return []
+    if not pointer.startswith('/'):
+        raise ValueError('invalid json pointer: {}'.format(pointer))
+    return [token.replace('~1', '/').replace('~0', '~')
+            for token in pointer.split('/')[1:]]
+
+
+def _diff_patch(new_dict, old_dict, hash_cache, numpy=None, **kwargs):
+    """ get the list of json patch (RFC 6902) operations,
+    to change old_dict into new_dict (see diff)
+    """
+    patch = []
+    leaf_pairs = []
+    stack = [(new_dict, old_dict, [])]
+    while stack:
+        new, old, path = stack.pop()
+        new_is_dict, old_is_dict = is_dict_like(new), is_dict_like(old)
+        new_is_iter = not new_is_dict and is_iter_non_string(new)
+        old_is_iter = not old_is_dict and is_iter_non_string(old)
+        if (new_is_dict and old_is_dict) or (new_is_iter and old_is_iter):
+            digest = _subtree_digest(new, '', hash_cache)
+            if (digest is not None
+                    and digest == _subtree_digest(old, '', hash_cache)):
+                continue
+        if new_is_dict and old_is_dict:
+            for key, val in new.items():
+                if key in old:
+                    stack.append((val, old[key], path + [key]))
+                else:
+                    patch.append({'op': 'add',
+                                  'path': _to_pointer(path + [key]),
+                                  'value': val})
+            for key in old:
+                if key not in new:
+                    patch.append({'op': 'remove',
+                                  'path': _to_pointer(path + [key])})
+        elif new_is_iter and old_is_iter:
+            common = min(len(new), len(old))
+            for i in range(common):
+                stack.append((new[i], old[i], path + [i]))
+            for i in range(common, len(new)):
+                patch.append({'op': 'add', 'path': _to_pointer(path + [i]),
+                              'value': new[i]})
+            # remove from the end, so that the indexes remain valid
+            for i in reversed(range(common, len(old))):
+                patch.append({'op': 'remove',
+                              'path': _to_pointer(path + [i])})
+        elif new_is_dict or old_is_dict or new_is_iter or old_is_iter:
+            patch.append({'op': 'replace', 'path': _to_pointer(path),
+                          'value': new})
+        else:
+            leaf_pairs.append((path, new, old))
+
+    if numpy is not None:
+        leaf_pairs = _not_allclose(leaf_pairs, numpy, **kwargs)
+    for path, new, old in leaf_pairs:
+        try:
+            if not (type(new) is type(old) and new == old):
+                patch.append({'op': 'replace', 'path': _to_pointer(path),
+                              'value': new})
+        except Exception:
+            patch.append({'op': 'replace', 'path': _to_pointer(path),
+                          'value': new})
+    return patch
+
+
+def apply_patch(d, patch):
+    """ apply a json patch (RFC 6902), i.e. a list of operations,
+    editing d in place
+
+    Parameters
+    ----------
+    d : dict
+    patch : list[dict]
+        operations; 'add', 'remove', 'replace', 'move', 'copy' or 'test',
+        with a json pointer 'path' (and 'from' for move or copy),
+        and a 'value' for add, replace or test
+
+    Returns
+    -------
+    d : dict
+        the edited d (or the new value, if the root path '' is replaced).
+        Added values are not copied
+
+    Notes
+    -----
+    pointer tokens are matched to dict keys by their str value,
+    so for keys that are not str, new keys are added as str
+
+    Examples
+    --------
+
+    >>> from pprint import pprint
+    >>> d = {'a': {'b': 1}, 'c': [1, 2]}
+    >>> patch = [{'op': 'replace', 'path': '/a/b', 'value': 2},
+    ...          {'op': 'add', 'path': '/c/-', 'value': 3},
+    ...          {'op': 'move', 'from': '/a', 'path': '/e'}]
+    >>> pprint(apply_patch(d, patch))
+    {'c': [1, 2, 3], 'e': {'b': 2}}
+
+    >>> apply_patch(d, [{'op': 'remove', 'path': '/x/y'}])
+    Traceback (most recent call last):
+    ...
+    KeyError: 'path not found: /x/y'
+
+    """
+    def resolve(pointer):
+        """ get the (parent, key) of a pointer (or (None, None) for root) """
+        keys = _from_pointer(pointer)
+        if not keys:
+            return None, None
+        parent = d
+        for i, key in enumerate(keys):
+            if is_dict_like(parent):
+                if key not in parent:
+                    for existing in parent:
+                        if str(existing) == key:
+                            key = existing
+                            break
+            elif is_iter_non_string(parent):
+                if key == '-' or not key.isdigit():
+                    key = len(parent) if key == '-' else None
+                else:
+                    key = int(key)
+            else:
+                key = None
+            if key is None:
+                raise KeyError('path not found: {}'.format(pointer))
+            if i == len(keys) - 1:
+                return parent, key
+            try:
+                parent = parent[key]
+            except (KeyError, IndexError):
+                raise KeyError('path not found: {}'.format(pointer))
+
+    def get(pointer):
+        parent, key = resolve(pointer)
+        if parent is None:
+            return d
+        try:
+            return parent[key]
+        except (KeyError, IndexError):
+            raise KeyError('path not found: {}'.format(pointer))
+
+    def remove(pointer):
+        value = get(pointer)
+        parent, key = resolve(pointer)
+        if parent is None:
+            raise ValueError('the root cannot be removed')
+        del parent[key]
+        return value
+
+    def add(pointer, value):
+        parent, key = resolve(pointer)
+        if parent is None:
+            return value
+        if is_dict_like(parent):
+            parent[key] = value
+        elif key > len(parent):
+            raise KeyError('path not found: {}'.format(pointer))
+        else:
+            parent.insert(key, value)
+        return d
+
+    for operation in patch:
+        op = operation.get('op')
+        pointer = operation.get('path')
+        if op == 'add':
+            d = add(pointer, operation['value'])
+        elif op == 'remove':
+            remove(pointer)
+        elif op == 'replace':
+            get(pointer)
+            parent, key = resolve(pointer)
+            if parent is None:
+                d = operation['value']
+            else:
+                parent[key] = operation['value']
+        elif op == 'move':
+            d = add(pointer, remove(operation['from']))
+        elif op == 'copy':
+            d = add(pointer, copy.deepcopy(get(operation['from'])))
+        elif op == 'test':
+            if get(pointer) != operation['value']:
+                raise ValueError('test failed for path: {}'.format(pointer))
+        else:
+            raise ValueError('unknown patch operation: {}'.format(op))
+    return d
+
+
 def diff(new_dict, old_dict, iter_prefix='__iter__',
-         np_allclose=False, **kwargs):
+         np_allclose=False, hash_cache=None, patch=False, **kwargs):
     """ return the difference between two dict_like objects
 
+    branches with the same (Merkle) hash, of their keys and leaf values,
+    are skipped, and only the leaves of differing branches are compared
+
     Parameters
     ----------
     new_dict: dict
@@ -1781,6 +3061,16 @@ def diff(new_dict, old_dict, iter_prefix='__iter__',
         prefix to use for list and tuple indexes
     np_allclose: bool
         if True, try using numpy.allclose to assess differences
+        (evaluated for all numeric leaves at once, see _not_allclose)
+    hash_cache: dict or None
+        a dict in which to store the hashes of each branch (by id),
+        to reuse them in later calls, e.g. when diffing many dicts against
+        the same reference. NB: the cached branches must not be modified
+    patch: bool
+        if True, return a json patch (RFC 6902) to change old_dict into
+        new_dict (see apply_patch), rather than the outcome dict.
+        Unlike the outcome, this includes empty dicts and lists,
+        but ignores iter_prefix (lists are always indexed)
     **kwargs:
         keyword arguments to parse to numpy.allclose
 
@@ -1817,6 +3107,28 @@ def diff(new_dict, old_dict, iter_prefix='__iter__',
     >>> diff({'a':1}, {'a':1+1e-10}, np_allclose=True)
     {}
 
+    >>> import numpy as np
+    >>> pprint(diff({'a': [1.0, 2.0, 'x'], 'b': np.array([1., 2.])},
+    ...             {'a': [1.0, 2.1, 'x'], 'b': np.array([1., 2.000000001])},
+    ...             np_allclose=True))
+    {'changes': [(('a', '__iter__1'), (2.0, 2.1))]}
+
+    >>> cache = {}
+    >>> old = {'a': {'b': [1, 2]}, 'c': {'d': 'x'}}
+    >>> diff({'a': {'b': [1, 2]}, 'c': {'d': 'y'}}, old, hash_cache=cache)
+    {'changes': [(('c', 'd'), ('y', 'x'))]}
+    >>> diff({'a': {'b': [1, 3]}, 'c': {'d': 'x'}}, old, hash_cache=cache)
+    {'changes': [(('a', 'b', '__iter__1'), (3, 2))]}
+
+    >>> new = {'a': {'b': [1, 2, 3]}, 'c': {'e': 'x'}}
+    >>> patch = diff(new, old, patch=True)
+    >>> pprint(patch)
+    [{'op': 'add', 'path': '/c/e', 'value': 'x'},
+     {'op': 'remove', 'path': '/c/d'},
+     {'op': 'add', 'path': '/a/b/2', 'value': 3}]
+    >>> apply_patch(old, patch) == new
+    True
+
     """
     if np_allclose:
         try:
@@ -1824,32 +3136,73 @@ def diff(new_dict, old_dict, iter_prefix='__iter__',
         except ImportError:
             raise ValueError("to use np_allclose, numpy must be installed")
 
-    dct1_flat = flatten(new_dict, all_iters=iter_prefix)
-    dct2_flat = flatten(old_dict, all_iters=iter_prefix)
+    if hash_cache is None:
+        hash_cache = {}
+    if patch:
+        if np_allclose:
+            kwargs['numpy'] = numpy
+        return _diff_patch(new_dict, old_dict, hash_cache, **kwargs)
+    for d in (new_dict, old_dict):
+        if _diff_branch(d, iter_prefix) is None:
+            raise TypeError('d is not dict like: {}'.format(d))
 
     outcome = {'insertions': [], 'deletions': [],
                'changes': [], 'uncomparable': []}
 
-    for path, val in dct1_flat.items():
-        if path not in dct2_flat:
-            outcome['insertions'].append((path, val))
+    def leaves(value, path):
+        if _diff_branch(value, iter_prefix) is None:
+            return [(path, value)]
+        return [(path + subpath, v) for subpath, v
+                in _iter_flatten(value, all_iters=iter_prefix)]
+
+    # the paths can differ, by keys that are equal but not identical
+    stack = [(new_dict, old_dict, (), ())]
+    leaf_pairs = []
+    while stack:
+        val, other_val, path, other_path = stack.pop()
+        items = _diff_branch(val, iter_prefix)
+        other_items = _diff_branch(other_val, iter_prefix)
+        if items is not None and other_items is not None:
+            digest = _subtree_digest(val, iter_prefix, hash_cache)
+            if (digest is not None and digest
+                    == _subtree_digest(other_val, iter_prefix, hash_cache)):
+                continue
+            other_keys = dict([(k, k) for k, _ in other_items])
+            other_items = dict(other_items)
+            for key, subval in reversed(items):
+                if key in other_items:
+                    other_subval = other_items.pop(key)
+                    if (type(subval) in _DIGEST_TYPES
+                            and type(other_subval) in _DIGEST_TYPES):
+                        leaf_pairs.append(
+                            (path + (key,), subval, other_subval))
+                        continue
+                    stack.append((subval, other_subval, path + (key,),
+                                  other_path + (other_keys[key],)))
+                else:
+                    outcome['insertions'].extend(
+                        leaves(subval, path + (key,)))
+            for key, subval in other_items.items():
+                outcome['deletions'].extend(
+                    leaves(subval, other_path + (key,)))
             continue
-        other_val = dct2_flat.pop(path)
-        if np_allclose:
-            try:
-                if numpy.allclose(val, other_val, **kwargs):
-                    continue
-            except Exception:
-                pass
+        elif items is not None or other_items is not None:
+            # a branch and a leaf have no paths in common
+            outcome['insertions'].extend(leaves(val, path))
+            outcome['deletions'].extend(leaves(other_val, other_path))
+            continue
+
+        leaf_pairs.append((path, val, other_val))
+
+    if np_allclose:
+        leaf_pairs = _not_allclose(leaf_pairs, numpy, **kwargs)
+    for path, val, other_val in leaf_pairs:
         try:
             if val != other_val:
                 outcome['changes'].append((path, (val, other_val)))
         except Exception:
             outcome['uncomparable'].append((path, (val, other_val)))
 
-    for path2, val2 in dct2_flat.items():
-        outcome['deletions'].append((path2, val2))
-
     # remove any empty lists and sort
     for key in list(outcome.keys()):
         if not outcome[key]:
@@ -1862,8 +3215,151 @@ def diff(new_dict, old_dict, iter_prefix='__iter__',
     return outcome
 
 
+# sidecar in the to_json folder: {relative path: [size, mtime, sha1]}
+_SHARD_HASHES = '.to_json.hashes'
+
+
+def _json_shards(dct, path, dirlevel, default_name):
+    """ create the folders for to_json,
+    yielding (path, obj, ensure_ascii) for each file to write
+    """
+    if not path.is_dir():
+        path.mkdir()
+        dirlevel -= 1
+
+    # if one or more values if not a nested dict
+    if not all([hasattr(v, 'items') for v in dct.values()]):
+        yield path.joinpath(default_name), dct, True
+        return
+
+    for key, val in dct.items():
+        if dirlevel <= 0:
+            yield path.joinpath('{}.json'.format(key)), val, False
+        else:
+            newpath = path.joinpath('{}'.format(key))
+            if not newpath.exists():
+                newpath.mkdir()
+            for shard in _json_shards(val, newpath, dirlevel - 1,
+                                      '{}.json'.format(key)):
+                yield shard
+
+
+@contextmanager
+def _atomic_open(fpath, mode='w', encoding=None):
+    """ open a temporary file, in the folder of fpath,
+    that is renamed to fpath if the context exits without an error,
+    so that fpath is never left partially written.
+    The permissions of an existing fpath are kept,
+    and if fpath is a symlink, the file it links to is replaced
+    """
+    fpath = os.path.realpath(fpath)
+    try:
+        perms = os.stat(fpath).st_mode & 0o7777
+    except OSError:
+        # the permissions of a newly created file
+        umask = os.umask(0)
+        os.umask(umask)
+        perms = 0o666 & ~umask
+    handle, temppath = tempfile.mkstemp(
+        dir=os.path.dirname(os.path.abspath(fpath)),
+        prefix='.', suffix='.tmp')
+    try:
+        with io.open(handle, mode, encoding=encoding) as file_obj:
+            yield file_obj
+        # mkstemp creates the file only readable by the user
+        os.chmod(temppath, perms)
+        _replace(temppath, fpath)
+    except BaseException:
+        if os.path.exists(temppath):
+            os.remove(temppath)
+        raise
+
+
+def _write_json_file(path, obj, ensure_ascii, sort_keys, indent, kwargs):
+    """ write obj to a json file for to_json, streaming it (see
+    backends.dump) to a temporary file that is renamed into place
+    """
+    if isinstance(path, pathlib.PurePath):
+        with _atomic_open(str(path), encoding='utf8') as outfile:
+            backends.dump(obj, outfile, ensure_ascii=ensure_ascii,
+                          sort_keys=sort_keys, indent=indent,
+                          default=encode, **kwargs)
+        return
+    # e.g. MockPath, which only records files that have been touched
+    path.touch()
+    with path.open('w') as outfile:
+        backends.dump(obj, outfile, ensure_ascii=ensure_ascii,
+                      sort_keys=sort_keys, indent=indent,
+                      default=encode, **kwargs)
+
+
+def _write_shard(args):
+    """ serialise a shard for to_json, and (if its hash differs from
+    old_digest) write it via a temporary file, that is renamed into place,
+    returning the [size, mtime, sha1] of the file
+    """
+    (fpath, obj, ensure_ascii, old_digest,
+     sort_keys, indent, kwargs) = args
+    string = backends.dumps(obj, ensure_ascii=ensure_ascii,
+                            sort_keys=sort_keys, indent=indent,
+                            default=encode, **kwargs)
+    data = string.encode('utf8')
+    digest = hashlib.sha1(data).hexdigest()
+    if digest != old_digest:
+        with _atomic_open(fpath, 'wb') as file_obj:
+            file_obj.write(data)
+    stat = os.stat(fpath)
+    return [stat.st_size, stat.st_mtime, digest]
+
+
+def _write_shards(shards, root, processes, incremental,
+                  sort_keys, indent, kwargs):
+    """ write the shards of to_json, in a pool of processes """
+    hash_path = os.path.join(str(root), _SHARD_HASHES)
+    old_hashes = {}
+    if incremental and os.path.isfile(hash_path):
+        with open(hash_path) as file_obj:
+            old_hashes = json.load(file_obj)
+
+    relpaths = []
+    jobs = []
+    for fpath, obj, ensure_ascii in shards:
+        fpath = str(fpath)
+        relpath = os.path.relpath(fpath, str(root)).replace(os.sep, '/')
+        old_digest = None
+        if relpath in old_hashes and os.path.isfile(fpath):
+            size, mtime, digest = old_hashes[relpath]
+            stat = os.stat(fpath)
+            # the file has not been modified since it was written
+            if [stat.st_size, stat.st_mtime] == [size, mtime]:
+                old_digest = digest
+        relpaths.append(relpath)
+        jobs.append((fpath, obj, ensure_ascii, old_digest,
+                     sort_keys, indent, kwargs))
+
+    if processes is None:
+        processes = multiprocessing.cpu_count()
+    if processes <= 1 or len(jobs) <= 1:
+        stamps = [_write_shard(job) for job in jobs]
+    else:
+        # so the workers use the same encoder plugins and json writer
+        initializer, initargs = _worker_initializer()
+        pool = multiprocessing.Pool(processes, initializer, initargs)
+        try:
+            stamps = pool.map(_write_shard, jobs)
+        finally:
+            pool.close()
+            pool.join()
+
+    if incremental:
+        hashes = json.dumps(dict(zip(relpaths, stamps)))
+        with _atomic_open(hash_path, 'wb') as file_obj:
+            file_obj.write(hashes.encode('utf8'))
+
+
 def to_json(dct, jfile, overwrite=False, dirlevel=0, sort_keys=True, indent=2,
-            default_name='root.json', **kwargs):
+            default_name='root.json', processes=1, incremental=False,
+            **kwargs):
     """ output dict to json
 
     Parameters
@@ -1881,9 +3377,33 @@ def to_json(dct, jfile, overwrite=False, dirlevel=0, sort_keys=True, indent=2,
     indent : int
         if non-negative integer, then JSON array elements and object members
         will be pretty-printed on new lines with that indent level spacing.
+    default_name : str
+        if jfile is path to folder, the file name for a dict that
+        has values which are not dicts
+    processes : int or None
+        if jfile is a folder path on the file system,
+        the number of worker processes that serialise and write the files
+        (if None, the number of cpus)
+    incremental : bool
+        if jfile is a folder path on the file system, only rewrite the files
+        whose content has changed since the last call with incremental=True
+        (content hashes are kept in a .to_json.hashes file in the folder)
     kwargs : dict
         keywords for json.dump
 
+    Notes
+    -----
+    json is written to each file in chunks, as it is encoded
+    (see backends.dump), rather than first building the whole string.
+    With processes other than 1, or incremental, each file is instead
+    serialised whole (in a worker).
+    Files on the file system are written to a temporary file,
+    that is renamed into place (keeping the permissions of a file
+    that it replaces), so that a failed dump never leaves a partially
+    written file. A path that is a symlink keeps linking to
+    the (replaced) file it links to.
+    Files are always encoded as utf8, whatever the locale.
+
     Examples
     --------
 
@@ -1918,11 +3438,28 @@ def to_json(dct, jfile, overwrite=False, dirlevel=0, sort_keys=True, indent=2,
         File("c.json") Contents:
          {"d": 3}
 
+    >>> import os, shutil, tempfile
+    >>> folder = tempfile.mkdtemp()
+    >>> dct = {'x': {'a': {'b': 1}, 'c': {'d': 3}}}
+    >>> to_json(dct, folder, dirlevel=1, processes=2, incremental=True)
+    >>> sorted(os.listdir(os.path.join(folder, 'x')))
+    ['a.json', 'c.json']
+    >>> mtime = os.stat(os.path.join(folder, 'x', 'a.json')).st_mtime
+    >>> dct['x']['c']['d'] = 4
+    >>> to_json(dct, folder, dirlevel=1, processes=2, incremental=True)
+    >>> os.stat(os.path.join(folder, 'x', 'a.json')).st_mtime == mtime
+    True
+    >>> with open(os.path.join(folder, 'x', 'c.json')) as f:
+    ...     print(f.read())
+    {
+      "d": 4
+    }
+    >>> shutil.rmtree(folder)
 
     """
     if hasattr(jfile, 'write'):
-        json.dump(dct, jfile, sort_keys=sort_keys,
-                  indent=indent, default=encode)
+        backends.dump(dct, jfile, sort_keys=sort_keys,
+                      indent=indent, default=encode)
         return
 
     if isinstance(jfile, basestring):
@@ -1940,46 +3477,27 @@ def to_json(dct, jfile, overwrite=False, dirlevel=0, sort_keys=True, indent=2,
                       'overwrite is set to false: {}'.format(jfile))
 
     if not path.is_dir() and dirlevel <= 0:
-        path.touch()  # try to create file if doesn't already exist
-        with path.open('w') as outfile:
-            outfile.write(unicode(json.dumps(
-                dct, sort_keys=sort_keys,
-                indent=indent, default=encode, **kwargs)))
-            return
+        _write_json_file(path, dct, True, sort_keys, indent, kwargs)
+        return
 
-    if not path.is_dir():
-        path.mkdir()
-        dirlevel -= 1
+    shards = _json_shards(dct, path, dirlevel, default_name)
 
-    # if one or more values if not a nested dict
-    if not all([hasattr(v, 'items') for v in dct.values()]):
-        newpath = path.joinpath(default_name)
-        newpath.touch()
-        with newpath.open('w') as outfile:
-            outfile.write(unicode(json.dumps(
-                dct, sort_keys=sort_keys,
-                indent=indent, default=encode, **kwargs)))
-            return
+    if processes != 1 or incremental:
+        if not isinstance(path, pathlib.PurePath):
+            raise ValueError('processes and incremental require a path '
+                             'on the file system: {}'.format(jfile))
+        _write_shards(shards, path, processes, incremental,
+                      sort_keys, indent, kwargs)
+        return
 
-    for key, val in dct.items():
-        if dirlevel <= 0:
-            newpath = path.joinpath('{}.json'.format(key))
-            newpath.touch()
-            with newpath.open('w') as outfile:
-                outfile.write(unicode(json.dumps(
-                    val, ensure_ascii=False, sort_keys=sort_keys,
-                    indent=indent, default=encode, **kwargs)))
-        else:
-            newpath = path.joinpath('{}'.format(key))
-            if not newpath.exists():
-                newpath.mkdir()
-            to_json(val, newpath, overwrite=overwrite, dirlevel=dirlevel - 1,
-                    sort_keys=sort_keys, indent=indent,
-                    default_name='{}.json'.format(key), **kwargs)
+    for newpath, val, ensure_ascii in shards:
+        _write_json_file(newpath, val, ensure_ascii, sort_keys, indent,
+                         kwargs)
 
 
 def dump(dct, jfile, overwrite=False, dirlevel=0, sort_keys=True,
-         indent=2, default_name='root.json', **kwargs):
+         indent=2, default_name='root.json', processes=1, incremental=False,
+         **kwargs):
     """ output dict to json
 
     Parameters
@@ -1997,12 +3515,22 @@ def dump(dct, jfile, overwrite=False, dirlevel=0, sort_keys=True,
     indent : int
         if non-negative integer, then JSON array elements and object members
         will be pretty-printed on new lines with that indent level spacing.
+    default_name : str
+        if jfile is path to folder, the file name for a dict that
+        has values which are not dicts
+    processes : int or None
+        if jfile is a folder path on the file system,
+        the number of worker processes that serialise and write the files
+        (if None, the number of cpus)
+    incremental : bool
+        if jfile is a folder path on the file system, only rewrite the files
+        whose content has changed since the last call with incremental=True
     kwargs : dict
         keywords for json.dump
     """
     to_json(dct, jfile, overwrite=overwrite, dirlevel=dirlevel,
-            sort_keys=sort_keys, indent=indent,
-            default_name=default_name, **kwargs)
+            sort_keys=sort_keys, indent=indent, default_name=default_name,
+            processes=processes, incremental=incremental, **kwargs)
 
 
 class to_html(object):  # noqa: N801
@@ -2093,13 +3621,13 @@ class to_html(object):  # noqa: N801
 
         def is_json(myjson):
             try:
-                json.loads(myjson)
+                backends.loads(myjson)
             except ValueError:
                 return False
             return True
 
         if is_dict_like(obj):
-            self.str = json.dumps(obj, default=encode, sort_keys=True)
+            self.str = backends.dumps(obj, default=encode, sort_keys=True)
         elif is_json(obj):
             self.str = obj
         else:
@@ -11,13 +11,23 @@
 
 
 # internal packages
+import hashlib
 import json
+import mmap
+import multiprocessing
+from multiprocessing.pool import ThreadPool
 import os
+import re
+import threading
+from collections import OrderedDict
 from decimal import Decimal
 
 # local imports
+from jsonextended import backends
 from jsonextended.edict import indexes, convert_type, pprint  # noqa: F401
-from jsonextended.plugins import decode
+from jsonextended.edict import diff as _dict_diff
+from jsonextended.plugins import decode, _get_decoder, _get_decoder_index
+from jsonextended.plugins import _worker_initializer
 
 # python 3 to 2 compatibility
 try:
@@ -43,9 +53,31 @@ except ImportError:
     pass
 
 
+def _object_hook():
+    """ get the object_hook to read json with; decode,
+    or None if no decoder plugins are loaded
+    (so that the 'auto' reader can use a fast backend)
+
+    Examples
+    --------
+
+    >>> from jsonextended import plugins
+    >>> plugins.unload_all_plugins()
+    >>> _object_hook() is None
+    True
+    >>> errors = plugins.load_builtin_plugins('decoders')
+    >>> _object_hook() is decode
+    True
+    >>> plugins.unload_all_plugins()
+
+    """
+    exact, subset = _get_decoder_index('json')
+    return decode if exact or subset else None
+
+
 def _get_keys(file_obj, key_path=None):
     key_path = [] if key_path is None else key_path
-    data = json.load(file_obj, object_hook=decode)
+    data = backends.load(file_obj, object_hook=_object_hook())
     data = indexes(data, key_path)
     if hasattr(data, 'keys'):
         return sorted([str(k) if isinstance(k, basestring) else k
@@ -57,19 +89,109 @@ def _get_keys(file_obj, key_path=None):
 def _get_keys_ijson(file_obj, key_path=None):
     key_path = [] if key_path is None else key_path
     try:
-        path_str = '.'.join(key_path)
-        keys = []
-        for prefix, etype, value in ijson.parse(file_obj):
-            if etype == 'map_key':
-                if prefix == path_str:
-                    keys.append(value)
-        return sorted([str(k) if isinstance(k, basestring) else k
-                       for k in keys])
+        events = ijson.basic_parse(file_obj)
     except NameError:
         warnings.warn('ijson package not found in environment, \
 please install for on-disk key indexing', ImportWarning)
         return _get_keys(file_obj, key_path)
 
+    try:
+        etype, _ = next(events)
+    except StopIteration:
+        return []
+    # reading stops as soon as the target map is closed
+    keys = _ijson_keys(events, etype, key_path, exhaust=False)
+    return sorted([str(k) if isinstance(k, basestring) else k
+                   for k in keys])
+
+
+_START_EVENTS = ('start_map', 'start_array')
+_END_EVENTS = ('end_map', 'end_array')
+
+
+def _ijson_skip(events, etype):
+    """ consume the remaining (ijson basic) events of a value,
+    given the event type it started with
+    """
+    if etype not in _START_EVENTS:
+        return
+    depth = 1
+    for etype, _ in events:
+        if etype in _START_EVENTS:
+            depth += 1
+        elif etype in _END_EVENTS:
+            depth -= 1
+            if not depth:
+                return
+
+
+def _ijson_keys(events, etype, key_path, exhaust=True):
+    """ get the keys of the map at key_path (relative to the current value),
+    from a stream of (ijson basic) events
+
+    Parameters
+    ----------
+    events : iter
+        (event type, value) pairs
+    etype : str
+        the event type the current value started with
+    key_path : list[str]
+        keys to follow ('item' indexes all items of an array)
+    exhaust : bool
+        if False, return as soon as the target map has been read,
+        otherwise consume all events of the current value
+
+    Examples
+    --------
+
+    >>> events = iter([('map_key', 'a'), ('start_array', None),
+    ...                ('number', 1), ('end_array', None),
+    ...                ('map_key', 'b'), ('start_map', None),
+    ...                ('map_key', 'c'), ('string', 'd'),
+    ...                ('end_map', None), ('map_key', 'e'),
+    ...                ('null', None), ('end_map', None)])
+    >>> _ijson_keys(events, 'start_map', ['b'], exhaust=False)
+    ['c']
+    >>> next(events)
+    ('map_key', 'e')
+
+    """
+    if not key_path:
+        if etype != 'start_map':
+            if exhaust:
+                _ijson_skip(events, etype)
+            return []
+        keys = []
+        for etype, value in events:
+            if etype == 'end_map':
+                break
+            keys.append(value)
+            _ijson_skip(events, next(events)[0])
+        return keys
+
+    keys = []
+    if etype == 'start_map':
+        for etype, value in events:
+            if etype == 'end_map':
+                break
+            vtype = next(events)[0]
+            if value == key_path[0]:
+                keys += _ijson_keys(events, vtype, key_path[1:], exhaust)
+                if not exhaust:
+                    return keys
+            else:
+                # skip over sibling sub-trees
+                _ijson_skip(events, vtype)
+    elif etype == 'start_array' and key_path[0] == 'item':
+        for etype, value in events:
+            if etype == 'end_array':
+                break
+            keys += _ijson_keys(events, etype, key_path[1:], exhaust=True)
+    elif exhaust:
+        _ijson_skip(events, etype)
+
+    return keys
+
 
 def _get_keys_folder(jdir, key_path=None, in_memory=True,
                      ignore_prefix=('.', '_')):
@@ -151,6 +273,12 @@ def jkeys(jfile, key_path=None, in_memory=True, ignore_prefix=('.', '_')):
     ignore_prefix : list[str]
         ignore folders beginning with these prefixes
 
+    Notes
+    -----
+    as for to_dict, with decoder plugins loaded, reads only use a fast json
+    backend if it has been selected explicitly, with
+    backends.set_backend(reader=...)
+
     Examples
     --------
 
@@ -182,6 +310,23 @@ def jkeys(jfile, key_path=None, in_memory=True, ignore_prefix=('.', '_')):
     """
     key_path = [] if key_path is None else key_path
 
+    index, children, fpath = _load_index(jfile)
+    if index is not None:
+        if (tuple(key_path) in children
+                and not _decoded_on_path(children, key_path)):
+            keys = children[tuple(key_path)]
+            return sorted([str(k) if isinstance(k, basestring) else k
+                           for k in keys])
+        try:
+            data = _read_indexed(fpath, index, children, key_path)
+        except KeyError:
+            data = _NOT_INDEXED
+        if data is not _NOT_INDEXED:
+            if not hasattr(data, 'keys'):
+                return []
+            return sorted([str(k) if isinstance(k, basestring) else k
+                           for k in data.keys()])
+
     def eval_file(file_obj):
         if not in_memory:
             return _get_keys_ijson(file_obj, key_path)
@@ -211,6 +356,78 @@ def jkeys(jfile, key_path=None, in_memory=True, ignore_prefix=('.', '_')):
             'file_like or path_like object: {}'.format(jfile))
 
 
+# placeholder key for a map, before its first map_key event
+_NO_KEY = object()
+
+
+# ijson events which cannot start a value
+_NOT_VALUE_START = ('map_key', 'end_map', 'end_array')
+
+
+class _EventBuilder(object):
+    """ build a python object directly from (ijson) parse events
+
+    decoder plugins are applied as each map is closed,
+    and numbers are converted to float unless parse_decimal=True,
+    so that only a single pass and copy of the data is required
+
+    Examples
+    --------
+
+    >>> builder = _EventBuilder()
+    >>> for event in [('start_map', None), ('map_key', 'a'),
+    ...               ('start_array', None), ('number', Decimal('1.5')),
+    ...               ('number', 2), ('end_array', None), ('end_map', None)]:
+    ...     builder.event(*event)
+    >>> builder.complete
+    True
+    >>> builder.value
+    {'a': [1.5, 2]}
+
+    """
+
+    def __init__(self, parse_decimal=False, object_hook=decode):
+        self.value = None
+        self.complete = False
+        self._parse_decimal = parse_decimal
+        self._object_hook = object_hook
+        self._containers = []
+        self._keys = []
+
+    def _add(self, obj):
+        if not self._containers:
+            self.value = obj
+            self.complete = True
+        elif self._keys[-1] is None:
+            self._containers[-1].append(obj)
+        else:
+            self._containers[-1][self._keys[-1]] = obj
+
+    def event(self, etype, value):
+        """ process a single (event type, value) pair """
+        if etype == 'map_key':
+            self._keys[-1] = value
+        elif etype == 'start_map':
+            self._containers.append({})
+            self._keys.append(_NO_KEY)
+        elif etype == 'start_array':
+            self._containers.append([])
+            self._keys.append(None)
+        elif etype == 'end_map':
+            self._keys.pop()
+            obj = self._containers.pop()
+            if self._object_hook is not None:
+                obj = self._object_hook(obj)
+            self._add(obj)
+        elif etype == 'end_array':
+            self._keys.pop()
+            self._add(self._containers.pop())
+        else:
+            if isinstance(value, Decimal) and not self._parse_decimal:
+                value = float(value)
+            self._add(value)
+
+
 def _file_with_keys(file_obj, key_path=None, parse_decimal=False):
     """read json with keys
 
@@ -229,28 +446,411 @@ def _file_with_keys(file_obj, key_path=None, parse_decimal=False):
 
     """
     key_path = [] if key_path is None else key_path
+    return _file_with_many_keys(file_obj, [key_path], parse_decimal)[0]
+
+
+def _file_with_many_keys(file_obj, key_paths, parse_decimal=False):
+    """read multiple sections of json, from a single pass of the file
 
+    Parameters
+    ----------
+    file_obj : object
+        object with read method
+    key_paths : list[list[str]]
+        keys to index before parsing
+    parse_decimal : bool
+        whether to parse numbers as Decimal instances (retains exact precision)
+
+    Notes
+    -----
+    reading stops as soon as every section has been closed
+
+    """
+    if not key_paths:
+        return []
     try:
-        objs = ijson.items(file_obj, '.'.join(key_path))
+        events = ijson.parse(file_obj)
     except NameError:
         warnings.warn('ijson package not found in environment, \
         please install for on-disk key indexing', ImportWarning)
-        data = json.load(
+        data = backends.load(
             file_obj, parse_float=Decimal if parse_decimal else float,
-            object_hook=decode)
-        return indexes(data, key_path)
+            object_hook=_object_hook())
+        return [indexes(data, key_path) for key_path in key_paths]
+
+    # {prefix: [index, ...]} of sections not yet started
+    pending = {}
+    for i, key_path in enumerate(key_paths):
+        pending.setdefault('.'.join(key_path), []).append(i)
+
+    results = [None] * len(key_paths)
+    remaining = len(key_paths)
+    active = []
+    for current, etype, value in events:
+        if current in pending and etype not in _NOT_VALUE_START:
+            active.extend((i, _EventBuilder(parse_decimal))
+                          for i in pending.pop(current))
+        if not active:
+            continue
+        for i, builder in active:
+            builder.event(etype, value)
+        if active[-1][1].complete:
+            # active sections are nested within those started before them,
+            # so the last started will always be the first to complete
+            for i, builder in active:
+                if builder.complete:
+                    results[i] = builder.value
+                    remaining -= 1
+            if not remaining:
+                return results
+            active = [a for a in active if not a[1].complete]
+
+    missing = [key_paths[i] for indices in pending.values() for i in indices]
+    raise KeyError('key path not available in json: {}'.format(
+        missing[0] if len(missing) == 1 else missing))
+
+
+def _mmap_with_keys(fpath, key_path=None, parse_decimal=False):
+    """read json (with keys) from a memory map of a file,
+    parsing the bytes directly (without decoding the file to a string)
+
+    Parameters
+    ----------
+    fpath : str
+        path to file
+    key_path : list[str]
+        key to index before parsing
+    parse_decimal : bool
+        whether to parse numbers as Decimal instances (retains exact precision)
+
+    """
+    key_path = [] if key_path is None else key_path
+    with open(fpath, 'rb') as file_obj:
+        if not os.fstat(file_obj.fileno()).st_size:
+            # empty files cannot be mapped
+            return _file_with_keys(file_obj, key_path, parse_decimal)
+        data = mmap.mmap(file_obj.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            return _file_with_keys(data, key_path, parse_decimal)
+        finally:
+            data.close()
+
+
+# on-disk key index (stored as a hidden sidecar file, next to the json file)
+_INDEX_VERSION = 1
+_TOKEN_RE = re.compile(br'"(?:[^"\\]|\\.)*"|[{}\[\]:,]')
+_BRACKET_RE = re.compile(br'"(?:[^"\\]|\\.)*"|[{}\[\]]')
+_WS_RE = re.compile(br'[ \t\n\r]*')
+_STAMP_BLOCK = 2 ** 16
+
+# {sidecar path: (stamp, index, children)}
+_index_cache = {}
+
+# sentinel for key paths not available from the index
+_NOT_INDEXED = object()
+
+
+def _real_file(jfile):
+    """ return the path string of jfile, if it is a file on the file system,
+    otherwise None
+    """
+    if isinstance(jfile, basestring):
+        return jfile if os.path.isfile(jfile) else None
+    if isinstance(jfile, pathlib.PurePath) and jfile.is_file():
+        return str(jfile)
+    return None
+
+
+def _index_path(fpath):
+    """ get the path of the index sidecar, for a json file path """
+    dirname, basename = os.path.split(fpath)
+    return os.path.join(dirname, '.{}.jindex'.format(basename))
+
+
+def _file_stamp(fpath):
+    """ get a stamp, that changes if the file is modified,
+    from its size, modification time and a hash of its start and end
+    """
+    stat = os.stat(fpath)
+    sha = hashlib.sha1()
+    with open(fpath, 'rb') as file_obj:
+        sha.update(file_obj.read(_STAMP_BLOCK))
+        if stat.st_size > _STAMP_BLOCK:
+            file_obj.seek(max(_STAMP_BLOCK, stat.st_size - _STAMP_BLOCK))
+            sha.update(file_obj.read(_STAMP_BLOCK))
+    return [stat.st_size, stat.st_mtime, sha.hexdigest()]
+
+
+def _scan_offsets(data, depth):
+    """ scan json bytes for the byte offset and length of values,
+    for each key path up to a certain depth (only maps are indexed)
+
+    Examples
+    --------
+
+    >>> data = b'{"a": 1, "b": {"c": [1, {"d": "}"}], "e": null}, "f": "g"}'
+    >>> index = _scan_offsets(data, 2)
+    >>> for path, (offset, length) in sorted(index.items()):
+    ...     print(path, data[offset:offset+length].decode('utf8'))
+    ('a',) 1
+    ('b',) {"c": [1, {"d": "}"}], "e": null}
+    ('b', 'c') [1, {"d": "}"}]
+    ('b', 'e') null
+    ('f',) "g"
+
+    """
+    index = {}
+    # frames for the indexed maps: [path, key, value start, value recorded]
+    stack = []
+    expect_key = False
+    skip_depth = 0
+    match = _TOKEN_RE.search(data, 0)
+    while match is not None:
+        token = match.group()
+        if skip_depth:
+            # inside a value which is not indexed, only track its nesting
+            if token in (b'{', b'['):
+                skip_depth += 1
+            elif token in (b'}', b']'):
+                skip_depth -= 1
+                if not skip_depth:
+                    frame = stack[-1]
+                    index[frame[0] + (frame[1],)] = (
+                        frame[2], match.end() - frame[2])
+                    frame[3] = True
+            match = (_BRACKET_RE if skip_depth else _TOKEN_RE).search(
+                data, match.end())
+            continue
+
+        if token == b'{' and not stack:
+            stack.append([(), None, None, True])
+            expect_key = True
+        elif not stack:
+            # the root is not a map
+            break
+        elif token in (b'{', b'['):
+            frame = stack[-1]
+            path = frame[0] + (frame[1],)
+            if token == b'{' and len(path) < depth:
+                stack.append([path, None, None, True])
+                expect_key = True
+            else:
+                skip_depth = 1
+        elif token in (b'}', b']'):
+            frame = stack.pop()
+            if not frame[3]:
+                # a number, boolean or null value
+                index[frame[0] + (frame[1],)] = (
+                    frame[2], len(data[frame[2]:match.start()].rstrip()))
+            if not stack:
+                break
+            parent = stack[-1]
+            index[frame[0]] = (parent[2], match.end() - parent[2])
+            parent[3] = True
+            expect_key = False
+        elif token == b',':
+            frame = stack[-1]
+            if not frame[3]:
+                index[frame[0] + (frame[1],)] = (
+                    frame[2], len(data[frame[2]:match.start()].rstrip()))
+                frame[3] = True
+            expect_key = True
+        elif token == b':':
+            frame = stack[-1]
+            frame[2] = _WS_RE.match(data, match.end()).end()
+            frame[3] = False
+        elif expect_key:
+            stack[-1][1] = json.loads(token.decode('utf8'))
+            expect_key = False
+        else:
+            frame = stack[-1]
+            index[frame[0] + (frame[1],)] = (
+                frame[2], match.end() - frame[2])
+            frame[3] = True
+
+        match = (_BRACKET_RE if skip_depth else _TOKEN_RE).search(
+            data, match.end())
+
+    return index
+
+
+def build_index(jfile, depth=2):
+    """ build an on-disk index of the json structure, for a json file
+
+    the index records the byte offset and length of the value for each key
+    path (of maps only) up to a certain depth, and is stored as a hidden
+    sidecar file (.<name>.jindex). Once built, `to_dict` and `jkeys` will
+    use it to read only the required section of the file, until the
+    file is modified (as assessed by its size, modification time and a hash
+    of its start and end)
+
+    Parameters
+    ----------
+    jfile : str or pathlib.Path
+        path to an existing json file (encoded as utf8)
+    depth : int
+        maximum length of key paths to index
+
+    Returns
+    -------
+    index : dict
+        {key_path: (offset, length)}
+
+    Examples
+    --------
+
+    >>> import os, shutil, tempfile
+    >>> folder = tempfile.mkdtemp()
+    >>> fpath = os.path.join(folder, 'test.json')
+    >>> with open(fpath, 'w') as f:
+    ...     length = f.write('{"a": {"b": [1, 2], "c": {"d": 3.1}}, "e": "f"}')
+    >>> index = build_index(fpath, depth=2)
+    >>> sorted(index.keys())
+    [('a',), ('a', 'b'), ('a', 'c'), ('e',)]
+    >>> sorted(os.listdir(folder))
+    ['.test.json.jindex', 'test.json']
+
+    >>> to_dict(fpath, ['a', 'c', 'd'])
+    3.1
+    >>> jkeys(fpath, ['a'])
+    ['b', 'c']
+
+    maps decoded by plugins are read the same as without the index
+
+    >>> from jsonextended import plugins
+    >>> errors = plugins.load_builtin_plugins('decoders')
+    >>> with open(fpath, 'w') as f:
+    ...     length = f.write('{"a": {"_python_Decimal_": "1.5"}}')
+    >>> jkeys(fpath, ['a']), to_dict(fpath, ['a'])
+    ([], Decimal('1.5'))
+    >>> to_dict(fpath, ['a', '_python_Decimal_'])
+    Traceback (most recent call last):
+    ...
+    KeyError: 'No indexes after: a'
+    >>> index = build_index(fpath)
+    >>> jkeys(fpath, ['a']), to_dict(fpath, ['a'])
+    ([], Decimal('1.5'))
+    >>> to_dict(fpath, ['a', '_python_Decimal_'])
+    Traceback (most recent call last):
+    ...
+    KeyError: 'No indexes after: a'
+    >>> plugins.unload_all_plugins()
+
+    >>> shutil.rmtree(folder)
+
+    """
+    fpath = _real_file(jfile)
+    if fpath is None:
+        raise IOError('jfile is not an existing file: {}'.format(jfile))
+    if depth < 1:
+        raise ValueError('depth must be greater than 0')
+
+    stamp = _file_stamp(fpath)
+    if stamp[0]:
+        with open(fpath, 'rb') as file_obj:
+            data = mmap.mmap(file_obj.fileno(), 0, access=mmap.ACCESS_READ)
+            try:
+                index = _scan_offsets(data, depth)
+            finally:
+                data.close()
+    else:
+        index = {}
+
+    with open(_index_path(fpath), 'w') as file_obj:
+        json.dump({'version': _INDEX_VERSION, 'stamp': stamp, 'depth': depth,
+                   'index': [[list(k), o, l] for k, (o, l) in index.items()]},
+                  file_obj)
+    _index_cache.pop(_index_path(fpath), None)
+
+    return index
+
+
+def _load_index(jfile):
+    """ load the index for a json file, if it exists and is up-to-date
+
+    Returns
+    -------
+    index : None or dict
+        {key_path: (offset, length)}
+    children : None or dict
+        {key_path: [key, ...]}
+    fpath : None or str
+
+    """
+    fpath = _real_file(jfile)
+    if fpath is None:
+        return None, None, None
+    ipath = _index_path(fpath)
+    if not os.path.exists(ipath):
+        _index_cache.pop(ipath, None)
+        return None, None, None
+
+    stamp = _file_stamp(fpath)
+    if ipath in _index_cache and _index_cache[ipath][0] == stamp:
+        return _index_cache[ipath][1], _index_cache[ipath][2], fpath
+
     try:
-        data = next(objs)  # .next()
-    except StopIteration:
-        raise KeyError('key path not available in json: {}'.format(key_path))
+        with open(ipath, 'r') as file_obj:
+            content = json.load(file_obj)
+    except ValueError:
+        return None, None, None
+    if (content.get('version') != _INDEX_VERSION
+            or content.get('stamp') != stamp):
+        _index_cache.pop(ipath, None)
+        return None, None, None
+
+    index = {}
+    children = {}
+    for key_path, offset, length in content['index']:
+        key_path = tuple(key_path)
+        index[key_path] = (offset, length)
+        children.setdefault(key_path[:-1], []).append(key_path[-1])
+    _index_cache[ipath] = (stamp, index, children)
+
+    return index, children, fpath
+
+
+def _decoded_on_path(children, key_path):
+    """ whether any indexed map on key_path (including the map at key_path)
+    would be replaced by a decoder plugin, when read without the index
+    """
+    for i in range(len(key_path) + 1):
+        keys = children.get(tuple(key_path[:i]))
+        if (keys is not None and
+                _get_decoder(OrderedDict.fromkeys(keys), 'json') is not None):
+            return True
+    return False
 
-    # by default ijson parses Decimal values
-    if not parse_decimal:
-        convert_type(data, Decimal, float, in_place=True)
 
-    datastr = json.dumps(data)
-    data = json.loads(datastr, object_hook=decode)
+def _read_indexed(fpath, index, children, key_path, parse_decimal=False):
+    """ read a key path from a json file, using its index
 
+    Returns
+    -------
+    data : object
+        the data, or _NOT_INDEXED if no section of the key path is indexed,
+        or the section is within a map that a decoder plugin would replace
+
+    """
+    for i in range(len(key_path), 0, -1):
+        if tuple(key_path[:i]) in index:
+            break
+    else:
+        return _NOT_INDEXED
+    if _decoded_on_path(children, key_path[:i - 1]):
+        return _NOT_INDEXED
+
+    offset, length = index[tuple(key_path[:i])]
+    with open(fpath, 'rb') as file_obj:
+        file_obj.seek(offset)
+        raw = file_obj.read(length)
+
+    data = backends.loads(raw, object_hook=_object_hook(),
+                          parse_float=Decimal if parse_decimal else float)
+    if key_path[i:]:
+        if not hasattr(data, 'keys'):
+            raise KeyError('No indexes after: {}'.format(key_path[i - 1]))
+        data = indexes(data, key_path[i:])
     return data
 
 
@@ -265,7 +865,8 @@ class _Terminus(object):
 
 
 def _folder_to_json(jdir, key_path=None, in_memory=True,
-                    ignore_prefix=('.', '_'), dic={}, parse_decimal=False):
+                    ignore_prefix=('.', '_'), dic={}, parse_decimal=False,
+                    use_mmap=False, tasks=None):
     """ read in folder structure as json
 
     e.g.
@@ -282,6 +883,10 @@ def _folder_to_json(jdir, key_path=None, in_memory=True,
 
     NB: json files are identified with .json extension
 
+    if tasks is a list, files are not parsed, but instead
+    (dic, name, path, key_path) tuples are appended to it
+    (see _fill_folder_tasks)
+
     """
     key_path = [] if key_path is None else key_path
 
@@ -297,16 +902,22 @@ def _folder_to_json(jdir, key_path=None, in_memory=True,
             name, ext = os.path.splitext(jsub.name)
             if name == search_key or not key_path:
                 key_found = True
-                if key_path:
+                if tasks is not None:
+                    tasks.append((dic, None if key_path else name,
+                                  jsub, key_path[1:]))
+                    if not key_path:
+                        # placeholder, to retain the key order
+                        dic[name] = None
+                elif key_path:
                     data = to_dict(jsub, key_path[1:], in_memory,
-                                   ignore_prefix, parse_decimal)
+                                   ignore_prefix, parse_decimal, use_mmap)
                     if isinstance(data, dict):
                         dic.update(data)
                     else:
                         dic.update({_Terminus(): data})
                 else:
                     dic[name] = to_dict(jsub, key_path[1:], in_memory,
-                                        ignore_prefix, parse_decimal)
+                                        ignore_prefix, parse_decimal, use_mmap)
 
         elif (jsub.is_dir()
               and not jsub.name.startswith(ignore_prefix)
@@ -323,14 +934,87 @@ def _folder_to_json(jdir, key_path=None, in_memory=True,
                 dic[jsub.name] = {}
                 sub_d = dic[jsub.name]
             _folder_to_json(jsub, key_path[1:], in_memory, ignore_prefix,
-                            sub_d, parse_decimal)
+                            sub_d, parse_decimal, use_mmap, tasks)
 
     if not key_found:
         raise KeyError('key not found: {0}'.format(search_key))
 
 
+def _load_task(task):
+    """ parse a single file of a folder (run in a worker) """
+    jsub, key_path, kwargs = task
+    try:
+        return to_dict(jsub, key_path, **kwargs)
+    except KeyError as err:
+        raise KeyError('{0}: {1}'.format(jsub, err.args[0] if err.args
+                                         else ''))
+    except Exception as err:
+        # add the path to the message, keeping the type of the error
+        if err.args and isinstance(err.args[0], basestring):
+            if isinstance(getattr(err, 'msg', None), basestring):
+                # json.JSONDecodeError is re-created from msg when pickled
+                err.msg = '{0}: {1}'.format(jsub, err.msg)
+            err.args = ('{0}: {1}'.format(jsub, err.args[0]),) + err.args[1:]
+        raise
+
+
+def _fill_folder_tasks(tasks, workers, use_processes=False, **kwargs):
+    """ parse the files collected by _folder_to_json, with a pool of workers,
+    and place the results in their parent dicts
+
+    the results are placed in the order the files were found,
+    so that the output is the same as for the serial case
+    """
+    if not tasks:
+        return
+    jobs = [(jsub, key_path, kwargs) for _, _, jsub, key_path in tasks]
+    if use_processes:
+        initializer, initargs = _worker_initializer()
+        pool = multiprocessing.Pool(workers, initializer, initargs)
+    else:
+        pool = ThreadPool(workers)
+    try:
+        results = pool.map(_load_task, jobs,
+                           chunksize=max(1, len(jobs) // (4 * workers)))
+    finally:
+        pool.close()
+        pool.join()
+    _place_task_results(tasks, results)
+
+
+def _place_task_results(tasks, results):
+    """ place parsed file data in their parent dicts """
+    for (dic, name, _, _), data in zip(tasks, results):
+        if name is not None:
+            dic[name] = data
+        elif isinstance(data, dict):
+            dic.update(data)
+        else:
+            dic.update({_Terminus(): data})
+
+
+def _folder_to_dict(jdir, key_path, in_memory, ignore_prefix, parse_decimal,
+                    use_mmap, workers, use_processes):
+    """ read in folder structure as json, optionally in parallel """
+    data = {}
+    if workers is None or workers <= 1:
+        _folder_to_json(jdir, key_path[:], in_memory, ignore_prefix,
+                        data, parse_decimal, use_mmap)
+    else:
+        tasks = []
+        _folder_to_json(jdir, key_path[:], in_memory, ignore_prefix,
+                        data, parse_decimal, use_mmap, tasks)
+        _fill_folder_tasks(tasks, workers, use_processes,
+                           in_memory=in_memory, ignore_prefix=ignore_prefix,
+                           parse_decimal=parse_decimal, use_mmap=use_mmap)
+    if isinstance(list(data.keys())[0], _Terminus):
+        data = list(data.values())[0]
+    return data
+
+
 def to_dict(jfile, key_path=None, in_memory=True,
-            ignore_prefix=('.', '_'), parse_decimal=False):
+            ignore_prefix=('.', '_'), parse_decimal=False, use_mmap=False,
+            workers=None, use_processes=False):
     """ input json to dict
 
     Parameters
@@ -348,6 +1032,31 @@ def to_dict(jfile, key_path=None, in_memory=True,
         ignore folders beginning with these prefixes
     parse_decimal : bool
         whether to parse numbers as Decimal instances (retains exact precision)
+    use_mmap : bool
+        if true, files on the file system are memory mapped and parsed as
+        bytes, in a single streaming pass (ignoring in_memory), so that peak
+        memory is roughly the size of the resulting objects
+        (rather than the size of the file plus the objects)
+    workers : int or None
+        for folders, the number of workers used to parse the files in parallel
+        (None or 1 parses them serially)
+    use_processes : bool
+        if true, the workers are processes rather than threads
+        (the files must then be on the file system)
+
+    Notes
+    -----
+    files are parsed with jsonextended.backends.load, with
+    object_hook=decode (to apply the decoder plugins) if any decoder plugins
+    are loaded. With the default reader ('auto'), a fast reader
+    (e.g. orjson, if installed) is then only used when no decoder plugins
+    are loaded, since otherwise the json module, which applies the hook
+    as it parses, is used. A fast reader can also be selected explicitly,
+    with backends.set_backend(reader=...) or backends.backend_context.
+    The hook is then applied as a separate pass over the parsed data,
+    so whether this is faster than the json module depends on the data
+    (with orjson 3.8, ~30% faster for nested dicts of scalars,
+    but ~10-80% slower for many small dicts or long lists of arrays)
 
     Examples
     --------
@@ -393,43 +1102,62 @@ def to_dict(jfile, key_path=None, in_memory=True,
     crystallographic: {...}
     primitive: {...}
 
+    >>> jdict3 = to_dict(path,['dir1','file1','initial'],use_mmap=True)
+    >>> jdict3 == jdict2
+    True
+
+    >>> to_dict(path,workers=2) == jdict1
+    True
+    >>> to_dict(path,['dir1','file1','initial'],workers=2) == jdict2
+    True
+
     """
     key_path = [] if key_path is None else key_path
 
+    if key_path:
+        index, children, fpath = _load_index(jfile)
+        if index is not None:
+            data = _read_indexed(fpath, index, children, key_path,
+                                 parse_decimal)
+            if data is not _NOT_INDEXED:
+                return data
+
+    if use_mmap:
+        fpath = _real_file(jfile)
+        if fpath is not None:
+            return _mmap_with_keys(fpath, key_path, parse_decimal)
+
     if isinstance(jfile, basestring):
         if not os.path.exists(jfile):
             raise IOError('jfile does not exist: {}'.format(jfile))
         if os.path.isdir(jfile):
-            data = {}
-            jpath = pathlib.Path(jfile)
-            _folder_to_json(jpath, key_path[:], in_memory, ignore_prefix,
-                            data, parse_decimal)
-            if isinstance(list(data.keys())[0], _Terminus):
-                data = data.values()[0]
+            data = _folder_to_dict(pathlib.Path(jfile), key_path, in_memory,
+                                   ignore_prefix, parse_decimal, use_mmap,
+                                   workers, use_processes)
         else:
             with open(jfile, 'r') as file_obj:
                 if key_path and not in_memory:
                     data = _file_with_keys(file_obj, key_path, parse_decimal)
                 elif key_path:
-                    data = json.load(
-                        file_obj, object_hook=decode,
+                    data = backends.load(
+                        file_obj, object_hook=_object_hook(),
                         parse_float=Decimal if parse_decimal else float)
                     data = indexes(data, key_path)
                 else:
-                    data = json.load(
-                        file_obj, object_hook=decode,
+                    data = backends.load(
+                        file_obj, object_hook=_object_hook(),
                         parse_float=Decimal if parse_decimal else float)
     elif hasattr(jfile, 'read'):
         if key_path and not in_memory:
             data = _file_with_keys(jfile, key_path, parse_decimal)
         elif key_path:
-            data = json.load(
-                jfile, object_hook=decode,
+            data = backends.load(
+                jfile, object_hook=_object_hook(),
                 parse_float=Decimal if parse_decimal else float)
             data = indexes(data, key_path)
         else:
-            data = json.load(
-                jfile, object_hook=decode,
+            data = backends.load(
+                jfile, object_hook=_object_hook(),
                 parse_float=Decimal if parse_decimal else float)
     elif hasattr(jfile, 'iterdir'):
         if jfile.is_file():
@@ -437,23 +1165,641 @@ def to_dict(jfile, key_path=None, in_memory=True,
                 if key_path and not in_memory:
                     data = _file_with_keys(file_obj, key_path, parse_decimal)
                 elif key_path:
-                    data = json.load(
-                        file_obj, object_hook=decode,
+                    data = backends.load(
+                        file_obj, object_hook=_object_hook(),
                         parse_float=Decimal if parse_decimal else float)
                     data = indexes(data, key_path)
                 else:
-                    data = json.load(
-                        file_obj, object_hook=decode,
+                    data = backends.load(
+                        file_obj, object_hook=_object_hook(),
                         parse_float=Decimal if parse_decimal else float)
         else:
-            data = {}
-            _folder_to_json(jfile, key_path[:], in_memory, ignore_prefix,
-                            data, parse_decimal)
-            if isinstance(list(data.keys())[0], _Terminus):
-                data = data.values()[0]
+            data = _folder_to_dict(jfile, key_path, in_memory, ignore_prefix,
+                                   parse_decimal, use_mmap, workers,
+                                   use_processes)
     else:
         raise ValueError(
             'jfile should be a str, '
             'file_like or path_like object: {}'.format(jfile))
 
     return data
+
+
+def _folder_tasks(jdir, entries, ignore_prefix, tasks):
+    """ collect the files to read for several (key_path, dic) entries,
+    as for _folder_to_json (with tasks), but listing each folder only once
+    """
+    found = [not key_path for key_path, _ in entries]
+
+    for jsub in jdir.iterdir():
+        if jsub.is_file() and jsub.name.endswith('.json'):
+            name, ext = os.path.splitext(jsub.name)
+            for i, (key_path, dic) in enumerate(entries):
+                if key_path and name != key_path[0]:
+                    continue
+                found[i] = True
+                tasks.append((dic, None if key_path else name,
+                              jsub, key_path[1:]))
+                if not key_path:
+                    # placeholder, to retain the key order
+                    dic[name] = None
+
+        elif jsub.is_dir() and not jsub.name.startswith(ignore_prefix):
+            sub_entries = []
+            for i, (key_path, dic) in enumerate(entries):
+                if key_path and jsub.name != key_path[0]:
+                    continue
+                found[i] = True
+                if jsub.name in dic.keys():
+                    raise IOError(
+                        'directory has a sub-dir and file with same name: '
+                        '{1} and {1}.json in {0}'.format(jdir, jsub.name))
+                if key_path:
+                    sub_d = dic
+                else:
+                    dic[jsub.name] = {}
+                    sub_d = dic[jsub.name]
+                sub_entries.append((key_path[1:], sub_d))
+            if sub_entries:
+                _folder_tasks(jsub, sub_entries, ignore_prefix, tasks)
+
+    for key_found, (key_path, _) in zip(found, entries):
+        if not key_found:
+            raise KeyError('key not found: {0}'.format(key_path[0]))
+
+
+def to_dicts(jfile, key_paths, in_memory=True,
+             ignore_prefix=('.', '_'), parse_decimal=False):
+    """ input multiple sections of json to dicts,
+    reading each json file only once
+
+    Parameters
+    ----------
+    jfile : str, file_like or path_like
+        if str, must be existing file or folder,
+        if file_like, must have 'read' method
+        if path_like, must have 'iterdir' method (see pathlib.Path)
+    key_paths : list[list[str]]
+        lists of keys to index into the json before parsing it
+        (key paths may be prefixes of each other)
+    in_memory : bool
+        if true reads full json into memory before filtering keys
+        (this is faster but uses more memory),
+        else all sections are extracted in a single on-disk pass,
+        which stops once every section has been read
+    ignore_prefix : list[str]
+        ignore folders beginning with these prefixes
+    parse_decimal : bool
+        whether to parse numbers as Decimal instances (retains exact precision)
+
+    Returns
+    -------
+    data : list
+        the data for each key path (in the same order)
+
+    Notes
+    -----
+    as for to_dict, with decoder plugins loaded, reads only use a fast json
+    backend if it has been selected explicitly, with
+    backends.set_backend(reader=...)
+
+    Examples
+    --------
+
+    >>> from jsonextended.utils import MockPath
+    >>> file_obj = MockPath('test.json',is_file=True,
+    ... content='''
+    ... {
+    ...  "a": 1,
+    ...  "b": [1.1,2.1],
+    ...  "c": {"d":"e","f":"g"}
+    ... }
+    ... ''')
+    ...
+
+    >>> to_dicts(file_obj, [["a"], ["c"], ["c", "f"]], in_memory=False)
+    [1, {'d': 'e', 'f': 'g'}, 'g']
+
+    >>> to_dicts(file_obj, [["b"], ["x"]], in_memory=False)
+    Traceback (most recent call last):
+    ...
+    KeyError: "key path not available in json: ['x']"
+
+    >>> to_dicts(file_obj, [], in_memory=False)
+    []
+
+    >>> from jsonextended.utils import get_test_path
+    >>> path = get_test_path()
+    >>> meta, initial = to_dicts(path, [['dir1','file1','meta'],
+    ...                                 ['dir1','file1','initial']])
+    >>> pprint(initial,depth=1)
+    crystallographic: {...}
+    primitive: {...}
+
+    """
+    key_paths = [list(key_path) for key_path in key_paths]
+
+    def eval_file(file_obj, key_paths=key_paths):
+        if not in_memory:
+            return _file_with_many_keys(file_obj, key_paths, parse_decimal)
+        data = backends.load(
+            file_obj, object_hook=_object_hook(),
+            parse_float=Decimal if parse_decimal else float)
+        return [indexes(data, key_path) for key_path in key_paths]
+
+    def eval_folder(jpath):
+        datas = [{} for _ in key_paths]
+        tasks = []
+        _folder_tasks(jpath, list(zip(key_paths, datas)), ignore_prefix,
+                      tasks)
+
+        # group the sections by file, so each file is read once
+        files = OrderedDict()
+        for _, _, jsub, key_path in tasks:
+            files.setdefault(id(jsub), (jsub, []))[1].append(key_path)
+        sections = {}
+        for file_id, (jsub, file_paths) in files.items():
+            with jsub.open() as file_obj:
+                sections[file_id] = iter(eval_file(file_obj, file_paths))
+        _place_task_results(
+            tasks, [next(sections[id(jsub)]) for _, _, jsub, _ in tasks])
+
+        results = []
+        for data in datas:
+            if data and isinstance(list(data.keys())[0], _Terminus):
+                data = list(data.values())[0]
+            results.append(data)
+        return results
+
+    if isinstance(jfile, basestring):
+        if not os.path.exists(jfile):
+            raise IOError('jfile does not exist: {}'.format(jfile))
+        if os.path.isdir(jfile):
+            return eval_folder(pathlib.Path(jfile))
+        else:
+            with open(jfile, 'r') as file_obj:
+                return eval_file(file_obj)
+    elif hasattr(jfile, 'read'):
+        return eval_file(jfile)
+    elif hasattr(jfile, 'iterdir'):
+        if jfile.is_file():
+            with jfile.open() as file_obj:
+                return eval_file(file_obj)
+        else:
+            return eval_folder(jfile)
+    else:
+        raise ValueError(
+            'jfile should be a str, '
+            'file_like or path_like object: {}'.format(jfile))
+
+
+def _json_events(jfile):
+    """ yield the (ijson basic) parse events of a json file """
+    if isinstance(jfile, basestring):
+        if not os.path.isfile(jfile):
+            raise IOError('jfile does not exist: {}'.format(jfile))
+        with open(jfile, 'rb') as file_obj:
+            for event in ijson.basic_parse(file_obj):
+                yield event
+    elif hasattr(jfile, 'read'):
+        for event in ijson.basic_parse(jfile):
+            yield event
+    elif hasattr(jfile, 'iterdir') and jfile.is_file():
+        with jfile.open('rb') as file_obj:
+            for event in ijson.basic_parse(file_obj):
+                yield event
+    else:
+        raise ValueError(
+            'jfile should be a str, file_like or path_like object '
+            'of a file: {}'.format(jfile))
+
+
+class _StreamDiff(object):
+    """ compare two streams of (ijson basic) events, in lock-step """
+
+    def __init__(self, iter_prefix, max_buffer, parse_decimal):
+        self.iter_prefix = iter_prefix
+        self.max_buffer = max_buffer
+        self.parse_decimal = parse_decimal
+
+    def is_branch(self, etype):
+        return etype == 'start_map' or (etype == 'start_array' and
+                                        self.iter_prefix is not None)
+
+    def build(self, events, etype, value):
+        """ build the value starting with (etype, value) """
+        if etype not in _START_EVENTS:
+            if isinstance(value, Decimal) and not self.parse_decimal:
+                value = float(value)
+            return value
+        builder = _EventBuilder(self.parse_decimal, object_hook=None)
+        builder.event(etype, value)
+        while not builder.complete:
+            builder.event(*next(events))
+        return builder.value
+
+    def leaves(self, events, etype, value, path):
+        """ yield the (path, leaf) of the value starting with (etype, value)
+        """
+        if not self.is_branch(etype):
+            yield path, self.build(events, etype, value)
+            return
+        # [path, index of next item, or None for a map]
+        stack = [[path, None if etype == 'start_map' else 0]]
+        key = None
+        for etype, value in events:
+            if etype == 'map_key':
+                key = value
+                continue
+            if etype in _END_EVENTS:
+                stack.pop()
+                if not stack:
+                    return
+                continue
+            parent = stack[-1]
+            if parent[1] is None:
+                subpath = parent[0] + (key,)
+            else:
+                subpath = parent[0] + (
+                    '{0}{1}'.format(self.iter_prefix, parent[1]),)
+                parent[1] += 1
+            if self.is_branch(etype):
+                stack.append([subpath, None if etype == 'start_map' else 0])
+            else:
+                yield subpath, self.build(events, etype, value)
+
+    def compare_built(self, new, old, path):
+        """ yield the differences of two built values (using edict.diff) """
+        outcome = _dict_diff({0: new}, {0: old}, self.iter_prefix)
+        for category in ('insertions', 'deletions',
+                         'changes', 'uncomparable'):
+            for subpath, val in outcome.get(category, []):
+                yield category, (path + subpath[1:], val)
+
+    def children(self, events, etype):
+        """ yield the (key, etype, value) of each item of a branch,
+        the events of each item must be consumed before the next is read
+        """
+        index = 0
+        for ctype, value in events:
+            if ctype in _END_EVENTS:
+                return
+            if etype == 'start_map':
+                key = value
+                ctype, value = next(events)
+            else:
+                key = '{0}{1}'.format(self.iter_prefix, index)
+                index += 1
+            yield key, ctype, value
+
+    def compare(self, new_events, old_events, new_start, old_start, path):
+        """ yield the differences of the values starting with
+        new_start and old_start, as (category, (path, val))
+        """
+        new_branch = self.is_branch(new_start[0])
+        old_branch = self.is_branch(old_start[0])
+        if new_branch and old_branch:
+            for item in self.compare_branches(new_events, old_events,
+                                              new_start[0], old_start[0],
+                                              path):
+                yield item
+        elif new_branch or old_branch:
+            # a branch and a leaf have no paths in common
+            for leaf in self.leaves(new_events, new_start[0], new_start[1],
+                                    path):
+                yield 'insertions', leaf
+            for leaf in self.leaves(old_events, old_start[0], old_start[1],
+                                    path):
+                yield 'deletions', leaf
+        else:
+            new = self.build(new_events, *new_start)
+            old = self.build(old_events, *old_start)
+            try:
+                if new != old:
+                    yield 'changes', (path, (new, old))
+            except Exception:
+                yield 'uncomparable', (path, (new, old))
+
+    def compare_branches(self, new_events, old_events, new_type, old_type,
+                         path):
+        """ compare the items of two branches in lock-step,
+        holding those with keys in a different order in a buffer
+        """
+        new_items = self.children(new_events, new_type)
+        old_items = self.children(old_events, old_type)
+        new_pending = OrderedDict()
+        old_pending = OrderedDict()
+        new_item = old_item = True
+        while new_item is not None or old_item is not None:
+            if new_item is not None:
+                new_item = next(new_items, None)
+            if old_item is not None:
+                old_item = next(old_items, None)
+
+            if (new_item is not None and old_item is not None
+                    and new_item[0] == old_item[0]):
+                for item in self.compare(new_events, old_events,
+                                         new_item[1:], old_item[1:],
+                                         path + (new_item[0],)):
+                    yield item
+                continue
+
+            if new_item is not None:
+                key, etype, value = new_item
+                subpath = path + (key,)
+                if key in old_pending:
+                    for item in self.compare_built(
+                            self.build(new_events, etype, value),
+                            old_pending.pop(key), subpath):
+                        yield item
+                elif old_item is None:
+                    for leaf in self.leaves(new_events, etype, value,
+                                            subpath):
+                        yield 'insertions', leaf
+                else:
+                    new_pending[key] = self.build(new_events, etype, value)
+            if old_item is not None:
+                key, etype, value = old_item
+                subpath = path + (key,)
+                if key in new_pending:
+                    for item in self.compare_built(
+                            new_pending.pop(key),
+                            self.build(old_events, etype, value), subpath):
+                        yield item
+                elif new_item is None:
+                    for leaf in self.leaves(old_events, etype, value,
+                                            subpath):
+                        yield 'deletions', leaf
+                else:
+                    old_pending[key] = self.build(old_events, etype, value)
+
+            if len(new_pending) + len(old_pending) > self.max_buffer:
+                raise ValueError(
+                    'more than {0} items at "{1}" are in a different order, '
+                    'increase max_buffer'.format(
+                        self.max_buffer, '.'.join([str(p) for p in path])))
+
+        for key, val in new_pending.items():
+            for item in self.compare_built(val, {}, path + (key,)):
+                yield item
+        for key, val in old_pending.items():
+            for item in self.compare_built({}, val, path + (key,)):
+                yield item
+
+
+def idiff(new_jfile, old_jfile, iter_prefix='__iter__', max_buffer=1000,
+          parse_decimal=False):
+    """ yield the differences between two json files,
+    parsing them in lock-step (with ijson), rather than loading them
+
+    differences are yielded in the order they are found,
+    in the same categories as edict.diff, as (category, item):
+
+    - "insertions" : (path, val)
+    - "deletions" : (path, val)
+    - "changes" : (path, (val1, val2))
+    - "uncomparable" : (path, (val1, val2)), for leaves that raise an
+      error when compared
+
+    the items of objects (or arrays) are compared as they are read,
+    and only those with keys in a different order in the two files are
+    held in memory until they are matched, or the object ends
+    (NB: decoder plugins are not applied to the values)
+
+    Parameters
+    ----------
+    new_jfile : str, file_like or path_like
+    old_jfile : str, file_like or path_like
+    iter_prefix : str or None
+        prefix to use for array indexes
+        (if None, arrays are compared as leaves)
+    max_buffer : int
+        the maximum number of out of order items to hold for an object,
+        before raising a ValueError
+    parse_decimal : bool
+        whether to parse numbers as Decimal instances (retains exact precision)
+
+    Examples
+    --------
+
+    >>> from io import BytesIO
+    >>> new = BytesIO(b'{"a": 1, "b": [1, 2], "c": {"d": "x"}}')
+    >>> old = BytesIO(b'{"c": {"d": "y"}, "a": 1, "b": [1], "e": null}')
+    >>> for category, item in idiff(new, old):
+    ...     print(category, item)
+    changes (('c', 'd'), ('x', 'y'))
+    insertions (('b', '__iter__1'), 2)
+    deletions (('e',), None)
+
+    """
+    try:
+        ijson
+    except NameError:
+        raise ImportError('the ijson package is required for idiff')
+    new_events = _json_events(new_jfile)
+    old_events = _json_events(old_jfile)
+    differ = _StreamDiff(iter_prefix, max_buffer, parse_decimal)
+    return differ.compare(new_events, old_events,
+                          next(new_events), next(old_events), ())
+
+
+class JSONCache(object):
+    """ an incremental cache of parsed json files and folders
+
+    each file's modification time and size is stored with its parsed data,
+    so that repeated reads only re-parse files that have changed or been
+    added (and drop those that have been deleted), i.e. the steady-state cost
+    of a reload is a stat() per file
+
+    Parameters
+    ----------
+    max_bytes : int or None
+        the memory budget for cached data,
+        measured as the (summed) size of the cached json files,
+        the least recently used files are evicted when it is exceeded
+    in_memory : bool
+        if true reads full json into memory before filtering keys
+        (this is faster but uses more memory)
+    ignore_prefix : list[str]
+        ignore folders beginning with these prefixes
+    parse_decimal : bool
+        whether to parse numbers as Decimal instances (retains exact precision)
+
+    Notes
+    -----
+    the returned data shares objects with the cache,
+    so should not be mutated in place (use copy.deepcopy if required)
+
+    Examples
+    --------
+
+    >>> import os, json, tempfile
+    >>> folder = tempfile.mkdtemp()
+    >>> with open(os.path.join(folder, 'a.json'), 'w') as f:
+    ...     json.dump({'x': 1}, f)
+    >>> with open(os.path.join(folder, 'b.json'), 'w') as f:
+    ...     json.dump({'y': 2}, f)
+
+    >>> cache = JSONCache()
+    >>> pprint(cache.to_dict(folder))
+    a:
+      x: 1
+    b:
+      y: 2
+    >>> cache.misses, cache.hits
+    (2, 0)
+
+    >>> with open(os.path.join(folder, 'a.json'), 'w') as f:
+    ...     json.dump({'x': 10}, f)
+    >>> os.remove(os.path.join(folder, 'b.json'))
+    >>> pprint(cache.to_dict(folder))
+    a:
+      x: 10
+    >>> cache.misses, cache.hits
+    (3, 0)
+    >>> len(cache)
+    1
+
+    >>> cache.to_dict(folder, ['a', 'x'])
+    10
+    >>> cache.to_dict(folder)['a']
+    {'x': 10}
+    >>> cache.misses, cache.hits
+    (4, 1)
+
+    >>> with open(os.path.join(folder, 'c.json'), 'w') as f:
+    ...     json.dump({'z': 3}, f)
+    >>> cache.to_dict(folder, ['c'])
+    {'z': 3}
+    >>> len(cache)
+    3
+    >>> os.remove(os.path.join(folder, 'c.json'))
+    >>> cache.to_dict(folder, ['a'])
+    {'x': 10}
+    >>> len(cache)
+    2
+
+    >>> small = JSONCache(max_bytes=0)
+    >>> small.to_dict(folder)['a']
+    {'x': 10}
+    >>> len(small)
+    0
+
+    >>> import shutil
+    >>> shutil.rmtree(folder)
+
+    """
+
+    def __init__(self, max_bytes=None, in_memory=True,
+                 ignore_prefix=('.', '_'), parse_decimal=False):
+        self.max_bytes = max_bytes
+        self.in_memory = in_memory
+        self.ignore_prefix = ignore_prefix
+        self.parse_decimal = parse_decimal
+        # (file path, key path) -> (stamp, nbytes, data), in LRU order
+        self._entries = OrderedDict()
+        self._nbytes = 0
+        self._lock = threading.RLock()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    @property
+    def nbytes(self):
+        """ the summed size of the cached json files """
+        return self._nbytes
+
+    def clear(self):
+        """ remove all entries from the cache """
+        with self._lock:
+            self._entries.clear()
+            self._nbytes = 0
+
+    def _pop(self, key):
+        _, nbytes, _ = self._entries.pop(key)
+        self._nbytes -= nbytes
+
+    def _load_file(self, jsub, key_path):
+        """ load a file, from the cache if it is unchanged """
+        fpath = os.path.abspath(str(jsub))
+        stat = os.stat(fpath)
+        stamp = (getattr(stat, 'st_mtime_ns', stat.st_mtime), stat.st_size)
+        key = (fpath, tuple(key_path))
+
+        with self._lock:
+            entry = self._entries.get(key, None)
+            if entry is not None:
+                # move to the end, as most recently used
+                self._entries.pop(key)
+                if entry[0] == stamp:
+                    self._entries[key] = entry
+                    self.hits += 1
+                    return entry[2]
+                self._nbytes -= entry[1]
+
+        data = to_dict(fpath, key_path, self.in_memory,
+                       self.ignore_prefix, self.parse_decimal)
+
+        with self._lock:
+            self.misses += 1
+            if key in self._entries:
+                self._pop(key)
+            nbytes = stat.st_size
+            if self.max_bytes is None or nbytes <= self.max_bytes:
+                self._entries[key] = (stamp, nbytes, data)
+                self._nbytes += nbytes
+            if self.max_bytes is not None:
+                while self._nbytes > self.max_bytes:
+                    self._pop(next(iter(self._entries)))
+        return data
+
+    def _prune(self, root, found, whole):
+        """ drop entries for files below root that were not found,
+        in a read of the whole folder, or else that no longer exist
+        """
+        root = os.path.join(os.path.abspath(root), '')
+        exists = {}
+        with self._lock:
+            for key in list(self._entries.keys()):
+                fpath = key[0]
+                if not fpath.startswith(root) or fpath in found:
+                    continue
+                if not whole and fpath not in exists:
+                    exists[fpath] = os.path.isfile(fpath)
+                if whole or not exists[fpath]:
+                    self._pop(key)
+
+    def to_dict(self, jfile, key_path=None):
+        """ input json to dict, re-parsing only new or modified files
+
+        Parameters
+        ----------
+        jfile : str or path_like
+            an existing file or folder on the file system
+        key_path : list[str]
+            a list of keys to index into the json before parsing it
+
+        """
+        key_path = [] if key_path is None else list(key_path)
+        fpath = str(jfile)
+        if not os.path.exists(fpath):
+            raise IOError('jfile does not exist: {}'.format(fpath))
+        if not os.path.isdir(fpath):
+            return self._load_file(fpath, key_path)
+
+        data = {}
+        tasks = []
+        _folder_to_json(pathlib.Path(fpath), key_path[:], self.in_memory,
+                        self.ignore_prefix, data, self.parse_decimal,
+                        tasks=tasks)
+        results = [self._load_file(jsub, sub_path)
+                   for _, _, jsub, sub_path in tasks]
+        self._prune(fpath, set(os.path.abspath(str(jsub))
+                               for _, _, jsub, _ in tasks), not key_path)
+        _place_task_results(tasks, results)
+
+        if isinstance(list(data.keys())[0], _Terminus):
+            data = list(data.values())[0]
+        return data
@@ -1,5 +1,5 @@
 #!/usr/bin/env python
-import json
+from jsonextended import backends
 
 
 class NBParser(object):
@@ -27,4 +27,4 @@ class NBParser(object):
     file_regex = '*.ipynb'
 
     def read_file(self, file_obj, **kwargs):
-        return json.load(file_obj)
+        return backends.load(file_obj)
@@ -1,6 +1,6 @@
 #!/usr/bin/env python
 
-import json
+from jsonextended import backends
 
 
 class JSON_Parser(object):  # noqa: N801
@@ -25,5 +25,6 @@ class JSON_Parser(object):  # noqa: N801
     file_regex = '*.json'
 
     def read_file(self, file_obj, **kwargs):
-        return json.load(file_obj, object_hook=kwargs.get('object_hook', None),
-                         parse_float=kwargs.get('parse_float', None))
+        return backends.load(file_obj,
+                             object_hook=kwargs.get('object_hook', None),
+                             parse_float=kwargs.get('parse_float', None))
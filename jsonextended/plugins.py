@@ -6,6 +6,7 @@ import glob
 import imp
 import inspect
 import os
+import types
 import uuid
 import warnings
 from fnmatch import fnmatch
@@ -33,7 +34,8 @@ try:
 except ImportError:
     def load_source(modname, fname): return imp.load_source(modname, fname)
 
-from jsonextended.utils import get_module_path
+from jsonextended import backends  # noqa: E402
+from jsonextended.utils import get_module_path  # noqa: E402
 
 # list of plugin categories,
 # and their minimal class attribute interface
@@ -52,6 +54,22 @@ _plugins_builtin = {'encoders': get_module_path(encoders),
 # the internal plugin store
 _all_plugins = {name: {} for name in _plugins_interface}
 
+# cache of {(type, outtype): encoder method (or None)}
+# and {intype: decoder index}, derived from the plugin store,
+# must be cleared whenever the plugin store changes
+_encoder_cache = {}
+_decoder_cache = {}
+
+# {module name: (file path, source)} of modules loaded by load_plugins_dir,
+# so that their classes can be re-created in worker processes
+_plugin_sources = {}
+
+
+def _clear_caches():
+    """ clear the lookup caches derived from the plugin store """
+    _encoder_cache.clear()
+    _decoder_cache.clear()
+
 
 def view_interfaces(category=None):
     """ return a view of the plugin minimal class attribute interface(s)
@@ -128,7 +146,12 @@ def view_plugins(category=None):
 
 
 def get_plugins(category):
-    """ get plugins for category """
+    """ get plugins for category
+
+    NB: the returned dict is the internal plugin store,
+    use the load/unload functions to modify it
+
+    """
     return _all_plugins[category]
 
 
@@ -169,6 +192,7 @@ def unload_all_plugins(category=None):
             _all_plugins[cat] = {}
     else:
         _all_plugins[category] = {}
+    _clear_caches()
 
 
 def unload_plugin(name, category=None):
@@ -211,6 +235,7 @@ def unload_plugin(name, category=None):
         for cat in _all_plugins:
             if name in _all_plugins[cat]:
                 _all_plugins[cat].pop(name)
+    _clear_caches()
 
 
 def load_plugin_classes(classes, category=None, overwrite=False):
@@ -264,6 +289,7 @@ def load_plugin_classes(classes, category=None, overwrite=False):
                     klass.__name__,
                     'does not match {} interface: {}'.format(pcat, pinterface)
                 ))
+    _clear_caches()
     return load_errors
 
 
@@ -313,6 +339,7 @@ def plugins_context(classes, category=None):
         for name, kls in list(_all_plugins[cat].items()):
             if name not in original[cat]:
                 _all_plugins[cat].pop(name)
+    _clear_caches()
 
 
 def load_plugins_dir(path, category=None, overwrite=False):
@@ -349,8 +376,12 @@ def load_plugins_dir(path, category=None, overwrite=False):
                 if hasattr(pypath, 'maketemp'):
                     with pypath.maketemp() as f:
                         module = load_source(mod_name, f.name)
+                        with open(f.name, 'rb') as source:
+                            source = source.read()
                 else:
                     module = load_source(mod_name, str(pypath))
+                    with open(str(pypath), 'rb') as source:
+                        source = source.read()
 
         except Exception as err:
             load_errors.append((str(pypath), 'Load Error: {}'.format(err)))
@@ -360,11 +391,71 @@ def load_plugins_dir(path, category=None, overwrite=False):
         class_members = inspect.getmembers(module, inspect.isclass)
         classes = [klass for klass_name, klass in class_members if
                    klass.__module__ == mod_name]
+        _plugin_sources[mod_name] = (str(pypath), source)
         load_errors += load_plugin_classes(classes, category, overwrite)
 
     return load_errors
 
 
+def _plugins_state():
+    """ get the loaded plugin classes, in a form that can be pickled
+
+    the classes of plugin files (see load_plugins_dir) are not importable
+    by name, so they are given as (module name, file path, source, name)
+    """
+    state = []
+    for cat, plugins in _all_plugins.items():
+        for plugin in plugins.values():
+            klass = plugin.__class__
+            if klass.__module__ in _plugin_sources:
+                fpath, source = _plugin_sources[klass.__module__]
+                klass = (klass.__module__, fpath, source, klass.__name__)
+            state.append((cat, klass))
+    return state
+
+
+def _load_plugins_state(state):
+    """ replace the loaded plugins with those of _plugins_state """
+    unload_all_plugins()
+    modules = {}
+    for cat, klass in state:
+        if isinstance(klass, tuple):
+            mod_name, fpath, source, name = klass
+            if mod_name not in modules:
+                module = types.ModuleType(mod_name)
+                exec(compile(source, fpath, 'exec'), module.__dict__)
+                modules[mod_name] = module
+                _plugin_sources[mod_name] = (fpath, source)
+            klass = getattr(modules[mod_name], name)
+        load_plugin_classes([klass], cat, overwrite=True)
+
+
+def _init_worker(state, backend):
+    """ initialise a worker process (see _worker_initializer) """
+    _load_plugins_state(state)
+    backends.set_backend(*backend)
+
+
+def _worker_initializer():
+    """ get the (initializer, initargs) for a multiprocessing.Pool,
+    so that its worker processes load the same plugins,
+    and use the same json backends, as this process
+    (with the spawn or forkserver start methods, they would otherwise
+    start with none loaded)
+
+    Examples
+    --------
+
+    >>> import multiprocessing
+    >>> initializer, initargs = _worker_initializer()
+    >>> pool = multiprocessing.Pool(1, initializer, initargs)
+    >>> pool.close()
+    >>> pool.join()
+
+    """
+    return _init_worker, (_plugins_state(), backends.get_backend())
+
+
 def load_builtin_plugins(category=None, overwrite=False):
     """load plugins from builtin directories
 
@@ -416,6 +507,31 @@ def load_builtin_plugins(category=None, overwrite=False):
     return load_errors
 
 
+def _get_encoder(objtype, outtype):
+    """ get the encoder method for an object type, or None if not available
+
+    the first loaded encoder, whose objclass matches (including subclasses)
+    and has a to_<outtype> method, is cached against the exact object type,
+    so subsequent look-ups are a single dict access
+
+    """
+    try:
+        return _encoder_cache[(objtype, outtype)]
+    except KeyError:
+        pass
+
+    method_name = 'to_{}'.format(outtype)
+    method = None
+    for encoder in get_plugins('encoders').values():
+        if (issubclass(objtype, encoder.objclass)
+                and hasattr(encoder, method_name)):
+            method = getattr(encoder, method_name)
+            break
+
+    _encoder_cache[(objtype, outtype)] = method
+    return method
+
+
 def encode(obj, outtype='json', raise_error=False):
     """ encode objects, via encoder plugins, to new types
 
@@ -443,13 +559,13 @@ def encode(obj, outtype='json', raise_error=False):
     '{1, 2, 3, 4}'
 
     >>> unload_all_plugins()
+    >>> encode(set([1,2,3,4,4]))
+    {1, 2, 3, 4}
 
     """
-    for encoder in get_plugins('encoders').values():
-        if (isinstance(obj, encoder.objclass)
-                and hasattr(encoder, 'to_{}'.format(outtype))):
-            return getattr(encoder, 'to_{}'.format(outtype))(obj)
-            break
+    method = _get_encoder(type(obj), outtype)
+    if method is not None:
+        return method(obj)
 
     if raise_error:
         raise ValueError(
@@ -459,6 +575,74 @@ def encode(obj, outtype='json', raise_error=False):
         return obj
 
 
+def _get_decoder_index(intype):
+    """ get the (cached) signature index of decoders,
+    with a from_<intype> method
+
+    Returns
+    -------
+    exact : dict
+        {(len(signature), key): [(order, signature, method), ...]},
+        with an entry for every key of the signature
+    subset : list
+        [(order, sentinel_key, signature, method), ...]
+        for decoders with allow_other_keys=True
+
+    """
+    try:
+        return _decoder_cache[intype]
+    except KeyError:
+        pass
+
+    method_name = 'from_{}'.format(intype)
+    exact = {}
+    subset = []
+    for order, decoder in enumerate(get_plugins('decoders').values()):
+        if not hasattr(decoder, method_name):
+            continue
+        method = getattr(decoder, method_name)
+        signature = frozenset(decoder.dict_signature)
+        if getattr(decoder, 'allow_other_keys', False):
+            sentinel = next(iter(signature)) if signature else None
+            subset.append((order, sentinel, signature, method))
+        elif not signature:
+            exact.setdefault((0, None), []).append((order, signature, method))
+        else:
+            for key in signature:
+                exact.setdefault((len(signature), key), []).append(
+                    (order, signature, method))
+
+    _decoder_cache[intype] = (exact, subset)
+    return exact, subset
+
+
+def _get_decoder(dct, intype):
+    """ get the decoder method for a dict, or None if not available
+
+    a dict matching no signatures is (in most cases)
+    rejected by a single look-up in the index
+
+    """
+    exact, subset = _get_decoder_index(intype)
+
+    found = None
+    if exact:
+        key = next(iter(dct)) if dct else None
+        for order, signature, method in exact.get((len(dct), key), ()):
+            if all(k in dct for k in signature):
+                found = (order, method)
+                break
+    for order, sentinel, signature, method in subset:
+        if found is not None and order > found[0]:
+            break
+        if ((sentinel is None or sentinel in dct)
+                and all(k in dct for k in signature)):
+            found = (order, method)
+            break
+
+    return None if found is None else found[1]
+
+
 def decode(dct, intype='json', raise_error=False):
     """ decode dict objects, via decoder plugins, to new type
 
@@ -478,19 +662,27 @@ def decode(dct, intype='json', raise_error=False):
     >>> decode({'_python_Decimal_':'1.3425345'})
     Decimal('1.3425345')
 
+    >>> decode({'_python_Decimal_':'1.3425345','other':1})
+    {'_python_Decimal_': '1.3425345', 'other': 1}
+
+    >>> class DecoderPlugin(object):
+    ...     plugin_name = 'example'
+    ...     plugin_descript = 'a decoder for dicts containing _example_ key'
+    ...     dict_signature = ('_example_',)
+    ...     allow_other_keys = True
+    ...     def from_json(self, obj):
+    ...         return obj['_example_']
+    >>> load_plugin_classes([DecoderPlugin], 'decoders')
+    []
+    >>> decode({'_example_': 1, 'other': 2})
+    1
+
     >>> unload_all_plugins()
 
     """
-    for decoder in get_plugins('decoders').values():
-        if (set(list(decoder.dict_signature)).issubset(dct.keys())
-            and hasattr(decoder, 'from_{}'.format(intype))
-                and getattr(decoder, 'allow_other_keys', False)):
-            return getattr(decoder, 'from_{}'.format(intype))(dct)
-            break
-        elif (sorted(list(decoder.dict_signature)) == sorted(dct.keys())
-              and hasattr(decoder, 'from_{}'.format(intype))):
-            return getattr(decoder, 'from_{}'.format(intype))(dct)
-            break
+    method = _get_decoder(dct, intype)
+    if method is not None:
+        return method(dct)
 
     if raise_error:
         raise ValueError('no suitable plugin found for: {}'.format(dct))
@@ -1,7 +1,7 @@
 #!/usr/bin/env python
 # -- coding: utf-8 --
 
-from fnmatch import fnmatch
+import os
 
 # make units optional when importing jsonextended
 try:
@@ -10,6 +10,77 @@ except ImportError:
     pass
 
 from jsonextended.edict import flatten, flatten2d, unflatten, merge
+from jsonextended.edict import _compile_patterns, _key_matcher
+
+# python 3 to 2 compatibility
+try:
+    basestring
+except NameError:
+    basestring = str
+
+
+def _normcase_path(path):
+    return tuple([os.path.normcase(k) if isinstance(k, basestring) else k
+                  for k in path])
+
+
+def _schema_finder(uschema_keys, use_wildcards=False):
+    """ get a function, find(dkey) -> ukey or None, which returns the first
+    of uschema_keys that dkey ends with (matching each element with fnmatch,
+    if use_wildcards)
+
+    keys without wildcards are found by a dict lookup of each suffix of dkey,
+    then only the keys with wildcards before it are tested,
+    if the last element of dkey matches the last element of any of them
+
+    Examples
+    --------
+
+    >>> find = _schema_finder([('a', 'b*'), ('b',), ('c?',), (1, 'd*')],
+    ...                       use_wildcards=True)
+    >>> find(('x', 'a', 'by')), find(('x', 'b')), find(('cd',)), find(('c',))
+    (('a', 'b*'), ('b',), ('c?',), None)
+    >>> find((1, 'dd'))
+    (1, 'd*')
+
+    """
+    # suffix -> position of the first key (without wildcards)
+    literals = {}
+    # (position, key, element matchers) of the keys with wildcards
+    wildcards = []
+    for i, ukey in enumerate(uschema_keys):
+        if use_wildcards and _compile_patterns(ukey)[2]:
+            wildcards.append((i, ukey, [_key_matcher([u]) for u in ukey]))
+        else:
+            literals.setdefault(
+                _normcase_path(ukey) if use_wildcards else ukey, i)
+    lengths = sorted(set([len(ukey) for ukey in literals]))
+    # whether dkey could end with any of the keys with wildcards
+    last_match = _key_matcher([ukey[-1] for _, ukey, _ in wildcards])
+
+    def find(dkey):
+        found = None
+        for length in lengths:
+            if length > len(dkey):
+                break
+            suffix = dkey[len(dkey) - length:]
+            i = literals.get(_normcase_path(suffix) if use_wildcards
+                             else suffix)
+            if i is not None and (found is None or i < found):
+                found = i
+        if not dkey or not last_match(dkey[-1]):
+            return None if found is None else uschema_keys[found]
+        for i, ukey, matchers in wildcards:
+            if found is not None and i > found:
+                break
+            if len(ukey) <= len(dkey) and all(
+                    [match(k) for match, k in
+                     zip(matchers, dkey[len(dkey) - len(ukey):])]):
+                found = i
+                break
+        return None if found is None else uschema_keys[found]
+
+    return find
 
 
 def get_in_units(value, units):
@@ -83,41 +154,31 @@ def apply_unitschema(data, uschema, as_quantity=True,
     uschema_flat = flatten(uschema, key_as_tuple=True)
     # sorted by longest key size, to get best match first
     uschema_keys = sorted(uschema_flat, key=len, reverse=True)
+    find = _schema_finder(uschema_keys, use_wildcards)
     data_flat = flatten(data, key_as_tuple=True, list_of_dicts=list_of_dicts)
 
     for dkey, dvalue in data_flat.items():
         converted = False
-        for ukey in uschema_keys:
+        ukey = find(dkey)
+        if ukey is not None:
+            # handle that it return an numpy object type if list of floats
+            if isinstance(dvalue, (list, tuple)):
+                dvalue = np.array(dvalue)
+                if dvalue.dtype == np.object:
+                    dvalue = dvalue.astype(float)
+
+            if isinstance(dvalue, _Quantity):
+                quantity = dvalue.to(uschema_flat[ukey])
+            else:
+                quantity = ureg.Quantity(dvalue, uschema_flat[ukey])
 
-            if not len(ukey) == len(dkey[-len(ukey):]):
-                continue
+            if convert_base:
+                quantity = quantity.to_base_units()
 
-            if use_wildcards:
-                match = all(
-                    [fnmatch(d, u) for u, d in zip(ukey, dkey[-len(ukey):])])
+            if as_quantity:
+                data_flat[dkey] = quantity
             else:
-                match = ukey == dkey[-len(ukey):]
-
-            if match:
-                # handle that it return an numpy object type if list of floats
-                if isinstance(dvalue, (list, tuple)):
-                    dvalue = np.array(dvalue)
-                    if dvalue.dtype == np.object:
-                        dvalue = dvalue.astype(float)
-
-                if isinstance(dvalue, _Quantity):
-                    quantity = dvalue.to(uschema_flat[ukey])
-                else:
-                    quantity = ureg.Quantity(dvalue, uschema_flat[ukey])
-
-                if convert_base:
-                    quantity = quantity.to_base_units()
-
-                if as_quantity:
-                    data_flat[dkey] = quantity
-                else:
-                    data_flat[dkey] = quantity.magnitude
-                break
+                data_flat[dkey] = quantity.magnitude
 
         if not converted and raise_outerr:
             raise KeyError('could not find units for {}'.format(dkey))